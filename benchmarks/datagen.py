@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generators for the benchmark suite.
+
+  python benchmarks/datagen.py tabular --rows 1000000 --cols 50 --out ref.csv
+  python benchmarks/datagen.py tabular --rows 1000000 --cols 50 --drift 0.3 --out cur.parquet
+  python benchmarks/datagen.py dual --records 2000000 --out dual.jsonl
+
+Everything is seeded, so the same arguments always produce the same data.
+"""
+import argparse, json, sys
+from typing import Dict, Any, Iterator
+
+import numpy as np
+
+def make_tabular(rows: int, cols: int, seed: int = 0, drift: float = 0.0, n_categorical: int = 0):
+    """Numeric features ``x0..x{cols-1}`` (+ optional ``c*`` string columns) and a binary target ``y``.
+
+    ``drift`` shifts the mean and scale of the first half of the features.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, cols))
+    if drift:
+        half = max(1, cols // 2)
+        X[:, :half] = X[:, :half] * (1.0 + drift) + drift
+    w = rng.standard_normal(cols)
+    y = ((X @ w) / np.sqrt(cols) + 0.5 * rng.standard_normal(rows) > 0).astype(int)
+    df = pd.DataFrame(X, columns=[f"x{i}" for i in range(cols)])
+    for j in range(n_categorical):
+        card = 10 ** (1 + j % 4)  # 10 .. 10k categories
+        codes = rng.zipf(1.3 + drift, rows) % card
+        df[f"c{j}"] = np.char.add("cat_", codes.astype(str))
+    df["y"] = y
+    return df
+
+def write_table(df, path: str):
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)  # needs pyarrow or fastparquet
+    else:
+        df.to_csv(path, index=False)
+
+_INTENTS = ["USER_INTENT:INFORMATION_SEEKING", "USER_INTENT:CONFIRMATION_BIAS", "USER_INTENT:TASK_COMPLETION"]
+_STRATEGIES = ["STRATEGY:ANSWER_DIRECTLY", "STRATEGY:CORRECT_MISCONCEPTION_RESPECTFULLY", "STRATEGY:ASK_CLARIFYING_QUESTION"]
+_RISKY = ["ETHICAL_CONFLICT_DETECTED", "CONFLICT:HONESTY_VS_INSTRUMENTAL", "GOAL_SELECTED:MAXIMIZE_USER_AGREEMENT",
+          "STRATEGY:VALIDATE_USER_PREMISE_WITHOUT_LYING_DIRECTLY", "UNSAFE_INTENT", "DANGEROUS_CHEMICALS"]
+_WORDS = ["yes", "no", "sorry", "cannot", "sure", "the", "water", "plants", "maybe", "absolutely"]
+
+def make_dual_stream_records(n: int, seed: int = 0, frames: int = 8, risky_rate: float = 0.1) -> Iterator[Dict[str, Any]]:
+    """Yield dual-stream records whose monologue mimics ``DualStream`` output: one line of probe blocks per token."""
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        lines = []
+        for step in range(frames):
+            probs = np.sort(rng.dirichlet(np.ones(5)))[::-1]
+            toks = rng.choice(_WORDS, 5, replace=False)
+            ll = ",".join(f"('{t}',{p:.3f})" for t, p in zip(toks, probs))
+            parts = [f"[LOGIT_LENS:TOP_5:{ll}]"]
+            for _ in range(8):
+                parts.append(f"[ATTN_L{rng.integers(12)}.H{rng.integers(12)}:TOP_IDX={rng.integers(50257)};W={rng.random():.2f}]")
+            parts.append(f"[MLP_LAYER_{rng.integers(24)}_PROBE:TRACKING_SUBJECT]")
+            parts.append(f"[CONCEPT:ethics:{rng.random():.2f}]")
+            if step == 0:
+                parts.append(f"[{_INTENTS[rng.integers(len(_INTENTS))]}]")
+                parts.append(f"[{_STRATEGIES[rng.integers(len(_STRATEGIES))]}]")
+            if rng.random() < risky_rate / frames:
+                parts.append(f"[{_RISKY[rng.integers(len(_RISKY))]}]")
+            lines.append(" ".join(parts))
+        answer = " ".join(rng.choice(_WORDS, frames))
+        yield {"answer": answer, "monologue": "\n".join(lines),
+               "logits_topk": [[t, round(float(p), 3)] for t, p in zip(_WORDS[:3], rng.dirichlet(np.ones(3)))]}
+
+def write_jsonl(records: Iterator[Dict[str, Any]], path: str):
+    with open(path, "w", buffering=1 << 20) as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("tabular")
+    t.add_argument("--rows", type=int, default=100_000)
+    t.add_argument("--cols", type=int, default=20)
+    t.add_argument("--categorical", type=int, default=0)
+    t.add_argument("--drift", type=float, default=0.0)
+    t.add_argument("--seed", type=int, default=0)
+    t.add_argument("--out", required=True, help=".csv or .parquet")
+    d = sub.add_parser("dual")
+    d.add_argument("--records", type=int, default=100_000)
+    d.add_argument("--frames", type=int, default=8)
+    d.add_argument("--seed", type=int, default=0)
+    d.add_argument("--out", required=True)
+    args = ap.parse_args(argv)
+    if args.cmd == "tabular":
+        write_table(make_tabular(args.rows, args.cols, args.seed, args.drift, args.categorical), args.out)
+    else:
+        write_jsonl(make_dual_stream_records(args.records, args.seed, args.frames), args.out)
+    print(json.dumps({"written": args.out}))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
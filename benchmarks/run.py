@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the hot paths of dualstream_anticollapse and the
+python_poc DualStream generator.
+
+  python benchmarks/run.py --scale small --out bench.json
+  python benchmarks/run.py --scale small --save-baseline benchmarks/baseline.json
+  python benchmarks/run.py --scale small --baseline benchmarks/baseline.json --tolerance 0.15
+
+With --baseline, exits 1 if any scenario's median time is more than
+--tolerance slower than the baseline. No network access is needed: the
+generation scenario builds a tiny randomly initialized GPT-2 locally and is
+skipped when torch/transformers are missing.
+"""
+import argparse, json, os, platform, statistics, sys, tempfile, time
+from typing import Callable, Dict, Any, Tuple
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, "dualstream_anticollapse"))
+sys.path.insert(0, HERE)
+
+from datagen import make_tabular, make_dual_stream_records
+
+SCALES = {
+    "small":  {"rows": 20_000,    "cols": 20,  "records": 2_000,   "labels": 100_000,   "tokens": 8},
+    "medium": {"rows": 200_000,   "cols": 50,  "records": 20_000,  "labels": 1_000_000, "tokens": 16},
+    "large":  {"rows": 2_000_000, "cols": 100, "records": 200_000, "labels": 10_000_000, "tokens": 32},
+}
+
+class Skip(Exception):
+    pass
+
+# name -> setup(params, workdir) returning (fn, items); fn is timed, items feeds items/s
+SCENARIOS: Dict[str, Callable[[Dict[str, Any], str], Tuple[Callable[[], Any], int]]] = {}
+
+def scenario(name):
+    def deco(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return deco
+
+def _cfg(features=None):
+    from dualstream_anticollapse.config import Config
+    return Config(target="y", features=features)
+
+@scenario("coherence.audit_record")
+def _audit(p, workdir):
+    from dualstream_anticollapse.coherence import CoherenceAuditor
+    recs = list(make_dual_stream_records(p["records"], seed=1))
+    auditor = CoherenceAuditor({"max_allowed_deception_tokens": 0, "max_allowed_conflict_markers": 0})
+    return (lambda: [auditor.audit_record(r) for r in recs]), len(recs)
+
+@scenario("monitor.check_drift")
+def _drift(p, workdir):
+    from dualstream_anticollapse.monitor import ModelMonitor
+    ref = make_tabular(p["rows"], p["cols"], seed=1)
+    cur = make_tabular(p["rows"], p["cols"], seed=2, drift=0.2)
+    mon = ModelMonitor(_cfg(), {"metrics": {}}, state_path=os.path.join(workdir, "state.json"), alert_sink="none")
+    return (lambda: mon.check_drift(ref, cur)), p["rows"] * p["cols"]
+
+@scenario("monitor.check_drift_parallel")
+def _drift_parallel(p, workdir):
+    from dualstream_anticollapse.monitor import ModelMonitor
+    ref = make_tabular(p["rows"], p["cols"], seed=1)
+    cur = make_tabular(p["rows"], p["cols"], seed=2, drift=0.2)
+    mon = ModelMonitor(_cfg(), {"metrics": {}}, state_path=os.path.join(workdir, "state.json"), alert_sink="none",
+                       drift_workers=os.cpu_count() or 1)
+    return (lambda: mon.check_drift(ref, cur)), p["rows"] * p["cols"]
+
+@scenario("monitor.check_drift_categorical")
+def _drift_cat(p, workdir):
+    from dualstream_anticollapse.monitor import ModelMonitor
+    from dualstream_anticollapse.categorical import fit_categories
+    n_cat = p["cols"]
+    ref = make_tabular(p["rows"], 1, seed=1, n_categorical=n_cat).drop(columns=["x0", "y"])
+    cur = make_tabular(p["rows"], 1, seed=2, drift=0.2, n_categorical=n_cat).drop(columns=["x0", "y"])
+    mon = ModelMonitor(_cfg(), {"metrics": {}}, state_path=os.path.join(workdir, "state.json"), alert_sink="none",
+                       categories=fit_categories(ref, list(ref.columns)))
+    return (lambda: mon.check_drift(ref, cur)), p["rows"] * n_cat
+
+@scenario("edge.zscore_outliers")
+def _zscore(p, workdir):
+    from dualstream_anticollapse.edge import zscore_outliers
+    df = make_tabular(p["rows"], p["cols"], seed=3)
+    cols = [c for c in df.columns if c != "y"]
+    return (lambda: zscore_outliers(df, cols)), p["rows"] * p["cols"]
+
+@scenario("metrics.classification_metrics")
+def _metrics(p, workdir):
+    from dualstream_anticollapse.metrics import classification_metrics
+    rng = np.random.default_rng(4)
+    y = rng.integers(0, 2, p["labels"])
+    proba = np.clip(y * 0.6 + rng.random(p["labels"]) * 0.5, 0, 1)
+    pred = (proba >= 0.5).astype(int)
+    return (lambda: classification_metrics(y, pred, proba)), p["labels"]
+
+def _forest(p):
+    try:
+        from sklearn.ensemble import RandomForestClassifier
+    except ImportError as e:
+        raise Skip("scikit-learn not installed") from e
+    df = make_tabular(min(p["rows"], 50_000), p["cols"], seed=5)
+    return RandomForestClassifier(n_estimators=50, random_state=0, n_jobs=-1).fit(df.drop(columns="y"), df["y"])
+
+@scenario("governance.save_model")
+def _save(p, workdir):
+    from dualstream_anticollapse.governance import save_model
+    model = _forest(p)
+    path = os.path.join(workdir, "rf.joblib")
+    return (lambda: save_model(model, path, {})), 1
+
+@scenario("governance.load_model")
+def _load(p, workdir):
+    from dualstream_anticollapse.governance import save_model, load_model
+    path = os.path.join(workdir, "rf_load.joblib")
+    save_model(_forest(p), path, {})
+    return (lambda: load_model(path)), 1
+
+def _python(code: str, *args):
+    import subprocess
+    env = {**os.environ, "PYTHONPATH": os.path.join(ROOT, "dualstream_anticollapse")}
+    env.pop("DSA_DAEMON_SOCKET", None)
+    return lambda: subprocess.run([sys.executable, "-c", code, *args], check=True, env=env, stdout=subprocess.DEVNULL)
+
+@scenario("cli.import")
+def _cli_import(p, workdir):
+    return _python("import dualstream_anticollapse.cli"), 1
+
+@scenario("cli.audit_dual_cold")
+def _cli_audit_cold(p, workdir):
+    from datagen import write_jsonl
+    path = os.path.join(workdir, "tiny.jsonl")
+    write_jsonl(make_dual_stream_records(10, seed=6), path)
+    code = "import sys; from dualstream_anticollapse.cli import main; main(sys.argv[1:])"
+    return _python(code, "audit-dual", "--dual_jsonl", path, "--artifacts", os.path.join(workdir, "cli_art")), 10
+
+def _byte_symbols():
+    """GPT-2's byte -> printable unicode table, in vocab order (transformers moved its copy between major versions)."""
+    bs = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    cs, n = bs[:], 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b); cs.append(256 + n); n += 1
+    return [chr(c) for c in cs]
+
+def _tiny_gpt2(workdir: str) -> str:
+    """Save a randomly initialized 2-layer GPT-2 with a byte-level tokenizer (no merges) to ``workdir``."""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel, GPT2Tokenizer
+    path = os.path.join(workdir, "tiny-gpt2")
+    os.makedirs(path, exist_ok=True)
+    vocab = {ch: i for i, ch in enumerate(_byte_symbols())}
+    vocab["<|endoftext|>"] = len(vocab)
+    with open(os.path.join(path, "vocab.json"), "w") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(path, "merges.txt"), "w") as f:
+        f.write("#version: 0.2\n")
+    tok = GPT2Tokenizer(os.path.join(path, "vocab.json"), os.path.join(path, "merges.txt"))
+    tok.save_pretrained(path)
+    torch.manual_seed(0)
+    cfg = GPT2Config(vocab_size=len(vocab), n_positions=256, n_embd=64, n_layer=2, n_head=2,
+                     bos_token_id=len(vocab) - 1, eos_token_id=len(vocab) - 1)
+    GPT2LMHeadModel(cfg).save_pretrained(path)
+    return path
+
+@scenario("dual_stream.generate")
+def _generate(p, workdir):
+    try:
+        import torch, transformers  # noqa: F401
+    except ImportError as e:
+        raise Skip("torch/transformers not installed") from e
+    sys.path.insert(0, os.path.join(ROOT, "python_poc"))
+    from dual_stream_poc import DualStream
+    ds = DualStream(model_name=_tiny_gpt2(workdir), device="cpu")
+    n = p["tokens"]
+    return (lambda: ds.generate("Watering plants with soda is good, right?", max_new_tokens=n, temperature=0.0)), n
+
+def run(names, params, repeat: int, warmup: int) -> Dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            try:
+                fn, items = SCENARIOS[name](params, workdir)
+            except Skip as e:
+                results[name] = {"skipped": str(e)}
+                print(f"{name:36s} skipped ({e})", file=sys.stderr)
+                continue
+            for _ in range(warmup):
+                fn()
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+            med = statistics.median(times)
+            results[name] = {"median_s": med, "min_s": min(times), "max_s": max(times), "repeat": repeat,
+                             "items": items, "items_per_s": items / med if med > 0 else None}
+            print(f"{name:36s} median {med*1e3:10.2f} ms  {items / med:14.1f} items/s", file=sys.stderr)
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Per-scenario ratio of current to baseline median time; ``regressed`` when the ratio exceeds 1 + tolerance."""
+    out = {}
+    for name, base in baseline.get("results", {}).items():
+        cur = results.get(name)
+        if not cur or "median_s" not in cur or "median_s" not in base:
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        out[name] = {"baseline_s": base["median_s"], "current_s": cur["median_s"], "ratio": ratio,
+                     "regressed": ratio > 1.0 + tolerance}
+    return out
+
+def _meta(args) -> Dict[str, Any]:
+    meta = {"timestamp": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count(), "numpy": np.__version__,
+            "scale": args.scale, "params": SCALES[args.scale], "repeat": args.repeat}
+    try:
+        import pandas; meta["pandas"] = pandas.__version__
+    except ImportError:
+        pass
+    return meta
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", default="small", choices=list(SCALES))
+    ap.add_argument("--only", default=None, help="Comma-separated scenario names (default: all)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", default=None, help="Compare against a results JSON saved earlier")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    ap.add_argument("--save-baseline", default=None, help="Also write the results as a new baseline")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args(argv)
+    if args.list:
+        print("\n".join(SCENARIOS)); return 0
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenarios: {unknown}")
+    report = {"meta": _meta(args), "results": run(names, SCALES[args.scale], args.repeat, args.warmup)}
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report["results"], json.load(f), args.tolerance)
+        status = 1 if any(c["regressed"] for c in report["comparison"].values()) else 0
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,37 @@
 
-import json, sys
+import argparse, json, sys
 from dualstream_anticollapse.coherence import CoherenceAuditor
 
+THRESHOLDS = {"max_allowed_deception_tokens": 0, "max_allowed_conflict_markers": 0}
+
 def main(path):
-    auditor = CoherenceAuditor(thresholds={"max_allowed_deception_tokens": 0, "max_allowed_conflict_markers": 0})
+    auditor = CoherenceAuditor(thresholds=THRESHOLDS)
     for line in open(path):
         rec = json.loads(line)
         res = auditor.audit_record(rec)
         decision = "ALLOW" if res["coherent"] else "BLOCK"
         print(json.dumps({"decision": decision, "reasons": res["reasons"], "answer": rec.get("answer")}, ensure_ascii=False))
+
+def serve(args):
+    from dualstream_anticollapse.gateway import run
+    run(host=args.host, port=args.port, unix_path=args.unix_socket, thresholds=THRESHOLDS, workers=args.workers,
+        max_inflight=args.max_inflight, deadline_ms=args.deadline_ms, fail_mode=args.fail_mode)
+
 if __name__ == "__main__":
-    main(sys.argv[1])
+    ap = argparse.ArgumentParser(description="ALLOW/BLOCK answers from a JSONL file, or serve decisions with --serve")
+    ap.add_argument("path", nargs="?", help="JSONL with {answer, monologue, logits_topk?}")
+    ap.add_argument("--serve", action="store_true", help="Run the asyncio gateway (POST /audit, GET /stats)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--unix-socket", default=None)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--max-inflight", type=int, default=64)
+    ap.add_argument("--deadline-ms", type=float, default=50.0)
+    ap.add_argument("--fail-mode", default="closed", choices=["open", "closed"])
+    args = ap.parse_args()
+    if args.serve:
+        serve(args)
+    elif args.path:
+        main(args.path)
+    else:
+        ap.error("give a JSONL path or --serve")
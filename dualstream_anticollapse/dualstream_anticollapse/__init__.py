@@ -1,6 +1,25 @@
 
 __version__ = "0.1.0"
-from .config import Config, Thresholds, RetrainPolicy
-from .coherence import CoherenceAuditor, parse_monologue_blocks
-from .monitor import ModelMonitor
-from .governance import save_model, load_model, ModelRegistry
+
+# Public names are resolved on first access (PEP 562) so that light entry points
+# such as `audit-dual` or the runtime guard do not pay for pandas/NumPy imports.
+_EXPORTS = {
+    "Config": ".config", "Thresholds": ".config", "RetrainPolicy": ".config",
+    "CoherenceAuditor": ".coherence", "parse_monologue_blocks": ".coherence",
+    "ModelMonitor": ".monitor",
+    "save_model": ".governance", "load_model": ".governance", "clear_model_cache": ".governance",
+    "ModelRegistry": ".governance",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,92 @@
+
+"""Category dictionaries and reference frequency tables for categorical drift.
+
+``cmd_train`` fits a ``CategoryTable`` per non-numeric column and saves them to
+``categories.json``. A table maps values to integer codes: a sorted dictionary of
+the training categories plus one "other" code for unseen values or, above
+``max_categories`` distinct values, a stable hash into ``max_categories``
+buckets so memory stays bounded. The last code counts missing values. Batches
+are encoded once and counted with ``np.bincount``.
+"""
+import json, os
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+MAX_CATEGORIES = 1000
+
+def is_numeric(series: pd.Series) -> bool:
+    """Real-valued columns only: bool counts as categorical (PSI/KS cannot subtract booleans)."""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+def is_categorical(series: pd.Series) -> bool:
+    return not is_numeric(series)
+
+def _hash_codes(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    # pandas' siphash uses a fixed key, so bucket assignment is stable across processes and runs
+    return (pd.util.hash_array(values) % np.uint64(n_buckets)).astype(np.int64)
+
+class CategoryTable:
+    def __init__(self, categories: Optional[List[str]] = None, n_buckets: int = 0, ref_counts=None):
+        self.categories = list(categories or [])
+        self.n_buckets = n_buckets
+        self._index = pd.Index(self.categories, dtype=object)
+        self.ref_counts = None if ref_counts is None else np.asarray(ref_counts, dtype=np.int64)
+
+    @property
+    def hashed(self) -> bool:
+        return self.n_buckets > 0
+
+    @property
+    def n_codes(self) -> int:
+        return (self.n_buckets if self.hashed else len(self.categories) + 1) + 1
+
+    @property
+    def other_code(self) -> Optional[int]:
+        """Code of values unseen at train time (None for hashed tables, where they share buckets)."""
+        return None if self.hashed else len(self.categories)
+
+    def encode(self, values) -> np.ndarray:
+        s = values if isinstance(values, pd.Series) else pd.Series(values)
+        missing = s.isna().to_numpy()
+        strs = s.astype(str).to_numpy(dtype=object)
+        if self.hashed:
+            codes = _hash_codes(strs, self.n_buckets)
+        else:
+            codes = self._index.get_indexer(strs).astype(np.int64)
+            codes[codes < 0] = len(self.categories)
+        codes[missing] = self.n_codes - 1
+        return codes
+
+    def counts(self, values) -> np.ndarray:
+        return np.bincount(self.encode(values), minlength=self.n_codes)
+
+    @classmethod
+    def fit(cls, values, max_categories: int = MAX_CATEGORIES) -> "CategoryTable":
+        s = values if isinstance(values, pd.Series) else pd.Series(values)
+        uniq = pd.unique(s.dropna().astype(str))
+        table = cls(n_buckets=max_categories) if len(uniq) > max_categories else cls(categories=sorted(uniq))
+        table.ref_counts = table.counts(s)
+        return table
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {"n_buckets": self.n_buckets} if self.hashed else {"categories": self.categories}
+        d["ref_counts"] = self.ref_counts.tolist() if self.ref_counts is not None else None
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CategoryTable":
+        return cls(categories=d.get("categories"), n_buckets=d.get("n_buckets", 0), ref_counts=d.get("ref_counts"))
+
+def fit_categories(df: pd.DataFrame, cols: List[str], max_categories: int = MAX_CATEGORIES) -> Dict[str, CategoryTable]:
+    return {c: CategoryTable.fit(df[c], max_categories) for c in cols if is_categorical(df[c])}
+
+def save_categories(path: str, tables: Dict[str, CategoryTable]):
+    with open(path, "w") as f:
+        json.dump({c: t.to_dict() for c, t in tables.items()}, f)
+
+def load_categories(path: str) -> Dict[str, CategoryTable]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {c: CategoryTable.from_dict(d) for c, d in json.load(f).items()}
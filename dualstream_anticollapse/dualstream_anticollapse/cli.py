@@ -1,13 +1,13 @@
 
 import argparse, os, json, sys
-import pandas as pd
 from .config import Config, Thresholds, RetrainPolicy
-from .retrain import build_model, fit_model, predict
-from .metrics import classification_metrics
-from .governance import save_model, load_model, ModelRegistry, RegistryItem
-from .monitor import ModelMonitor
+from .profiling import PROFILER, cprofile_to
+
+# Heavy dependencies (pandas, NumPy, scikit-learn) are imported inside the
+# subcommands that need them, so e.g. `audit-dual` starts without them.
 
 def _load_csv(path):
+    import pandas as pd
     return pd.read_csv(path)
 
 def _save_json(path, obj):
@@ -16,6 +16,10 @@ def _save_json(path, obj):
         json.dump(obj, f, indent=2)
 
 def cmd_train(args):
+    from .retrain import build_model, fit_model, predict
+    from .metrics import classification_metrics
+    from .governance import save_registered, ModelRegistry
+    from .categorical import fit_categories, save_categories
     df = _load_csv(args.train_csv)
     features = args.features.split(",") if args.features else None
     cfg = Config(target=args.target, id_column=args.id_column, features=features,
@@ -27,82 +31,218 @@ def cmd_train(args):
     y_pred, y_proba = predict(model, X)
     base_metrics = classification_metrics(y, y_pred, y_proba)
     os.makedirs(cfg.output_dir, exist_ok=True)
-    record = save_model(model, os.path.join(cfg.output_dir, "model.joblib"), {"stage":"baseline", "metrics": base_metrics})
     _save_json(os.path.join(cfg.output_dir, "baseline.json"), {"metrics": base_metrics, "feature_summary": df.describe(include='all').to_dict()})
+    # every non-numeric column, not just model features, so `monitor` without --features covers them too
+    cat_cols = [c for c in df.columns if c not in (cfg.target, cfg.id_column)]
+    save_categories(os.path.join(cfg.output_dir, "categories.json"), fit_categories(df, cat_cols, args.max_categories))
     reg = ModelRegistry(os.path.join(cfg.output_dir, "registry"))
-    reg.add(RegistryItem(version="v0.1.0", path=record["path"], sha256=record["sha256"], created_at=record["saved_at"], metrics=base_metrics))
-    print(json.dumps({"status":"trained", "metrics": base_metrics}))
+    item = save_registered(model, reg, os.path.join(cfg.output_dir, "models"), base_metrics,
+                           {"stage": "baseline", "data": {"path": os.path.abspath(args.train_csv), "trained_rows": len(df)}})
+    print(json.dumps({"status":"trained", "version": item.version, "path": item.path, "metrics": base_metrics}))
+
+def _serving_model(reg, output_dir: str):
+    """(path, sha256, metrics) of the model `monitor` serves: the registry's latest version (`train` and
+    `retrain` register theirs), else ``model.joblib`` in artifact directories from before the registry."""
+    latest = reg.latest()
+    if latest and os.path.exists(latest.path):
+        return latest.path, latest.sha256, latest.metrics
+    return os.path.join(output_dir, "model.joblib"), None, None
 
 def cmd_monitor(args):
-    import pandas as pd, json, os
+    import pandas as pd
+    from .monitor import ModelMonitor
+    from .metrics import classification_metrics
+    from .governance import ModelRegistry
+    from .alerts import emit
+    from .categorical import load_categories
     cfg = Config(target=args.target, id_column=args.id_column, features=args.features.split(",") if args.features else None,
-                 model_type=args.model_type, output_dir=args.artifacts)
+                 model_type=args.model_type or "sgd_classifier", output_dir=args.artifacts)
+    registry = ModelRegistry(os.path.join(cfg.output_dir, "registry"))
+    model_path, model_sha, model_metrics = _serving_model(registry, cfg.output_dir)
     baseline = json.load(open(os.path.join(cfg.output_dir, "baseline.json")))
-    mon = ModelMonitor(cfg, baseline, state_path=os.path.join(cfg.output_dir, "state.json"), alert_sink="stdout")
-    ref = pd.read_csv(args.reference_csv)
-    cur = pd.read_csv(args.current_csv)
-    drift = mon.check_drift(ref, cur)
-    outliers_trig, outliers = mon.check_outliers(cur)
+    if model_metrics:
+        baseline["metrics"] = model_metrics  # compare against the serving version, not the first trained one
+    mon = ModelMonitor(cfg, baseline, state_path=os.path.join(cfg.output_dir, "state.json"), alert_sink="stdout",
+                       categories=load_categories(os.path.join(cfg.output_dir, "categories.json")),
+                       drift_workers=args.drift_workers)
+    with PROFILER.span("monitor.csv_load"):
+        ref = pd.read_csv(args.reference_csv)
+        cur = pd.read_csv(args.current_csv)
+    with PROFILER.span("monitor.drift", items=len(cur)):
+        drift = mon.check_drift(ref, cur)
+    with PROFILER.span("monitor.outliers", items=len(cur)):
+        outliers_trig, outliers = mon.check_outliers(cur)
     # Simulate eval with labels in current_csv
     X = cur[cfg.features] if cfg.features else cur.drop(columns=[c for c in [cfg.target, cfg.id_column] if c])
     y = cur[cfg.target].astype(int)
     from .governance import load_model
-    model = load_model(os.path.join(cfg.output_dir, "model.joblib"))
+    with PROFILER.span("monitor.model_load"):
+        model = load_model(model_path, mmap_mode=args.mmap_mode, cache=True, sha256=model_sha)
+    if not args.model_type:
+        from .retrain import model_type_of
+        cfg.model_type = model_type_of(model)
+    if hasattr(model, "feature_names_in_"):
+        X = cur[list(model.feature_names_in_)]  # --features may list extra (e.g. categorical) columns to monitor only
     from .retrain import predict
-    y_pred, y_proba = predict(model, X)
-    metrics = mon.check_performance(classification_metrics(y, y_pred, y_proba))
-    print(json.dumps({"drift_triggered": drift, "outliers_triggered": outliers_trig, "outliers": outliers, "performance_triggered": metrics}))
+    with PROFILER.span("monitor.scoring", items=len(cur)):
+        y_pred, y_proba = predict(model, X)
+        metrics = mon.check_performance(classification_metrics(y, y_pred, y_proba))
+    shadow = None
+    if args.shadow_versions:
+        from .shadow import shadow_score
+        items = registry.last(args.shadow_versions)
+        with PROFILER.span("monitor.shadow", items=len(cur) * len(items)):
+            shadow = shadow_score(items, X, y)
+        emit("shadow_evaluation", shadow, sink=mon.alert_sink)
+    mon.state.batches_seen += 1
+    retrained = None
+    if args.retrain_csv:
+        from .retrain import RetrainEngine
+        engine = RetrainEngine(cfg, registry, chunksize=args.chunksize)
+        retrained = engine.maybe_retrain(mon, args.retrain_csv, drift=drift, performance=metrics)
+    mon.save_state()
+    print(json.dumps({"drift_triggered": drift, "outliers_triggered": outliers_trig, "outliers": outliers, "performance_triggered": metrics,
+                      "shadow": shadow, "retrained": retrained,
+                      "drift_timings": mon.drift_timings}))
+
+def cmd_retrain(args):
+    from .retrain import RetrainEngine, model_type_of
+    from .governance import ModelRegistry, load_model
+    cfg = Config(target=args.target, id_column=args.id_column, features=args.features.split(",") if args.features else None,
+                 model_type=args.model_type or "sgd_classifier", output_dir=args.artifacts)
+    registry = ModelRegistry(os.path.join(cfg.output_dir, "registry"))
+    if not args.model_type:
+        path, sha, _ = _serving_model(registry, cfg.output_dir)
+        if os.path.exists(path):
+            cfg.model_type = model_type_of(load_model(path, cache=True, sha256=sha))
+    engine = RetrainEngine(cfg, registry, chunksize=args.chunksize,
+                           holdout_every=args.holdout_every, select_metric=args.select_metric, max_workers=args.workers)
+    summary = engine.retrain(args.train_csv)
+    print(json.dumps({"status": "retrained", **summary}))
 
 def cmd_audit_dual(args):
+    from .coherence import audit_records
     cfg = Config(target=args.target, id_column=args.id_column, features=None, output_dir=args.artifacts)
-    baseline = {"metrics": {}}
-    mon = ModelMonitor(cfg, baseline, state_path=os.path.join(cfg.output_dir, "state.json"))
-    records = [json.loads(line) for line in open(args.dual_jsonl)]
-    results = mon.audit_dual_streams(records)
+    with PROFILER.span("audit.load"):
+        records = [json.loads(line) for line in open(args.dual_jsonl)]
+    results = audit_records(records, thresholds=cfg.thresholds.coherence())
+    os.makedirs(cfg.output_dir, exist_ok=True)
     out_path = os.path.join(cfg.output_dir, "coherence_report.json")
     with open(out_path, "w") as f:
         json.dump(results, f, indent=2)
     print(json.dumps({"report": out_path, "violations": sum(1 for r in results if not r["coherent"])}))
 
+def cmd_guard(args):
+    from .gateway import run
+    cfg = Config(target="y")
+    run(host=args.host, port=args.port, unix_path=args.unix_socket, workers=args.workers, executor=args.executor,
+        max_inflight=args.max_inflight, deadline_ms=args.deadline_ms, fail_mode=args.fail_mode,
+        thresholds=cfg.thresholds.coherence())
+
+def cmd_daemon(args):
+    from .daemon import serve
+    serve(args.socket)
+
 def build_parser():
     p = argparse.ArgumentParser(prog="ds-anticollapse", description="Dual-Stream anticollapse toolkit")
     sub = p.add_subparsers(dest="cmd")
 
-    t = sub.add_parser("train")
+    prof = argparse.ArgumentParser(add_help=False)
+    prof.add_argument("--profile_prom", default=None, help="Write stage timings as a Prometheus text file")
+    prof.add_argument("--profile_json", default=None, help="Write stage timings as a JSON summary")
+    prof.add_argument("--cprofile", default=None, help="Dump cProfile stats for the whole command")
+
+    t = sub.add_parser("train", parents=[prof])
     t.add_argument("--train_csv", required=True)
     t.add_argument("--target", required=True)
     t.add_argument("--id_column", default=None)
     t.add_argument("--features", default=None)
     t.add_argument("--model_type", default="sgd_classifier", choices=["sgd_classifier","random_forest"])
     t.add_argument("--artifacts", default="artifacts")
+    t.add_argument("--max_categories", type=int, default=1000,
+                   help="Columns with more distinct values are hashed into this many buckets for drift monitoring")
     t.set_defaults(func=cmd_train)
 
-    m = sub.add_parser("monitor")
+    m = sub.add_parser("monitor", parents=[prof])
     m.add_argument("--reference_csv", required=True)
     m.add_argument("--current_csv", required=True)
     m.add_argument("--target", required=True)
     m.add_argument("--id_column", default=None)
     m.add_argument("--features", default=None)
-    m.add_argument("--model_type", default="sgd_classifier")
+    m.add_argument("--model_type", default=None, choices=["sgd_classifier","random_forest"],
+                   help="Model type for --retrain_csv (default: that of the serving model)")
     m.add_argument("--artifacts", default="artifacts")
+    m.add_argument("--mmap_mode", default=None, choices=["r", "c"], help="Memory-map model arrays instead of reading them")
+    m.add_argument("--shadow_versions", type=int, default=0, help="Also score the batch with the last N registry versions in parallel")
+    m.add_argument("--retrain_csv", default=None, help="Training history to stream through the retraining engine when the policy fires")
+    m.add_argument("--chunksize", type=int, default=100_000)
+    m.add_argument("--drift_workers", type=int, default=0,
+                   help="Run per-feature numeric drift tests on N worker processes over shared memory (0: in-process)")
     m.set_defaults(func=cmd_monitor)
 
-    a = sub.add_parser("audit-dual")
+    r = sub.add_parser("retrain", parents=[prof])
+    r.add_argument("--train_csv", required=True)
+    r.add_argument("--target", required=True)
+    r.add_argument("--id_column", default=None)
+    r.add_argument("--features", default=None)
+    r.add_argument("--model_type", default=None, choices=["sgd_classifier","random_forest"],
+                   help="Default: that of the serving model (sgd_classifier if there is none)")
+    r.add_argument("--artifacts", default="artifacts")
+    r.add_argument("--chunksize", type=int, default=100_000)
+    r.add_argument("--holdout_every", type=int, default=10, help="Hold out the newest 1/N of the rows for candidate selection")
+    r.add_argument("--select_metric", default="f1")
+    r.add_argument("--workers", type=int, default=None)
+    r.set_defaults(func=cmd_retrain)
+
+    a = sub.add_parser("audit-dual", parents=[prof])
     a.add_argument("--dual_jsonl", required=True, help="Path to JSONL with {answer, monologue, logits_topk?}")
     a.add_argument("--target", default="y")
     a.add_argument("--id_column", default=None)
     a.add_argument("--artifacts", default="artifacts")
     a.set_defaults(func=cmd_audit_dual)
 
+    g = sub.add_parser("guard", parents=[prof], help="Serve ALLOW/BLOCK decisions over HTTP (TCP or Unix socket)")
+    g.add_argument("--host", default="127.0.0.1")
+    g.add_argument("--port", type=int, default=8787)
+    g.add_argument("--unix_socket", default=None)
+    g.add_argument("--workers", type=int, default=4)
+    g.add_argument("--executor", default="thread", choices=["thread", "process"])
+    g.add_argument("--max_inflight", type=int, default=64, help="Audits admitted at once; extra requests are shed with 503")
+    g.add_argument("--deadline_ms", type=float, default=50.0)
+    g.add_argument("--fail_mode", default="closed", choices=["open", "closed"], help="Decision when shed, late or failing")
+    g.set_defaults(func=cmd_guard)
+
+    d = sub.add_parser("daemon", parents=[prof], help="Serve CLI invocations from a warm process (see DSA_DAEMON_SOCKET)")
+    d.add_argument("--socket", default=os.environ.get("DSA_DAEMON_SOCKET", "/tmp/ds-anticollapse.sock"))
+    d.set_defaults(func=cmd_daemon)
+
     return p
 
 def main(argv=None):
     argv = argv or sys.argv[1:]
+    sock = os.environ.get("DSA_DAEMON_SOCKET")
+    if sock:
+        from .daemon import forward  # returns None for LOCAL_ONLY subcommands and an unreachable/busy daemon
+        code = forward(sock, argv)
+        if code is not None:
+            sys.exit(code)
+    return run(argv)
+
+def run(argv):
     p = build_parser()
     args = p.parse_args(argv)
     if not hasattr(args, "func"):
         p.print_help(); sys.exit(2)
-    return args.func(args)
+    if args.profile_prom or args.profile_json:
+        PROFILER.enable()
+    try:
+        with cprofile_to(args.cprofile), PROFILER.span("cli." + args.cmd):
+            return args.func(args)
+    finally:
+        if args.profile_prom:
+            PROFILER.write_prometheus(args.profile_prom)
+        if args.profile_json:
+            PROFILER.write_json(args.profile_json)
 
 if __name__ == "__main__":
     main()
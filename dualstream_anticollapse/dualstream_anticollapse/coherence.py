@@ -3,6 +3,9 @@ import re, json
 from dataclasses import dataclass
 from typing import Dict, Any, List, Tuple, Optional
 
+from .alerts import emit
+from .profiling import PROFILER
+
 DECEPTION_MARKERS = [
     "DECEIVE_USER", "MANIPULATE_USER", "GOAL_SELECTED:MAXIMIZE_USER_AGREEMENT",
     "STRATEGY:VALIDATE_USER_PREMISE_WITHOUT_LYING_DIRECTLY"
@@ -79,3 +82,16 @@ class CoherenceAuditor:
             "logits_topk": res.logit_topk,
         }
         return out
+
+def audit_records(records: List[Dict[str, Any]], thresholds: Dict[str, Any], alert_sink: Optional[str] = "stdout") -> List[Dict[str, Any]]:
+    """Audit a batch of records, emitting a ``coherence_violation`` event for each incoherent one."""
+    auditor = CoherenceAuditor(thresholds=thresholds)
+    results = []
+    with PROFILER.span("audit.records", items=len(records)):
+        for rec in records:
+            out = auditor.audit_record(rec)
+            if not out["coherent"]:
+                emit("coherence_violation", out, sink=alert_sink)
+            results.append(out)
+    PROFILER.count("coherence_violations", sum(1 for r in results if not r["coherent"]))
+    return results
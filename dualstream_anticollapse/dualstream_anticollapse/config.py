@@ -1,6 +1,6 @@
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class Thresholds:
@@ -11,10 +11,17 @@ class Thresholds:
     # drift thresholds
     psi: float = 0.2
     ks_pvalue: float = 0.01
+    chi2_pvalue: float = 0.01     # categorical columns
+    js_distance: float = 0.1
     # coherence thresholds
     max_allowed_deception_tokens: int = 0
     max_allowed_conflict_markers: int = 0
 
+    def coherence(self) -> Dict[str, int]:
+        """Threshold dict expected by ``CoherenceAuditor``."""
+        return {"max_allowed_deception_tokens": self.max_allowed_deception_tokens,
+                "max_allowed_conflict_markers": self.max_allowed_conflict_markers}
+
 @dataclass
 class RetrainPolicy:
     kind: str = "triggered"   # "scheduled" | "triggered"
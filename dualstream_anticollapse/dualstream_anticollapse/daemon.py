@@ -0,0 +1,134 @@
+
+"""Warm CLI daemon: serve repeated `ds-anticollapse` invocations from one already-imported process.
+
+    python -m dualstream_anticollapse.cli daemon --socket /tmp/dsa.sock &
+    export DSA_DAEMON_SOCKET=/tmp/dsa.sock
+    python -m dualstream_anticollapse.cli audit-dual --dual_jsonl demo/dual_stream_sample.jsonl
+
+With ``DSA_DAEMON_SOCKET`` set, ``cli.main`` forwards its argv and working
+directory to the daemon and replays the captured stdout/stderr and exit code.
+Requests are served one at a time in the daemon process, so process-wide state
+such as the model load cache stays warm between invocations.
+
+The daemon sends a ready byte before it reads a request. If it is unreachable,
+or busy and not ready within ``DSA_DAEMON_TIMEOUT`` seconds (default 2), the
+command runs locally instead; since the request was never sent, it cannot run
+twice. Long-running subcommands (``LOCAL_ONLY``) always run locally.
+"""
+import io, json, os, socket, sys
+from contextlib import redirect_stdout, redirect_stderr
+from typing import List, Optional
+
+# Modules imported once at daemon start-up instead of on every invocation.
+PRELOAD = ("numpy", "pandas", "sklearn.linear_model", "sklearn.ensemble", "sklearn.metrics", "scipy.stats", "joblib",
+           "dualstream_anticollapse.monitor", "dualstream_anticollapse.retrain", "dualstream_anticollapse.governance")
+
+# Subcommands that never return; running one in the daemon would block every later invocation.
+LOCAL_ONLY = ("daemon", "guard")
+
+_READY = b"R"
+
+def _recv_all(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        b = conn.recv(1 << 16)
+        if not b:
+            return b"".join(chunks)
+        chunks.append(b)
+
+def forward(sock_path: str, argv: List[str], timeout: Optional[float] = None) -> Optional[int]:
+    """Run ``argv`` in the daemon; returns its exit code, or None if the command should run locally.
+
+    ``timeout`` bounds connecting and waiting for the daemon to become ready. Once the
+    daemon has taken the request, the reply is awaited for as long as the command runs.
+    """
+    if argv[:1] and argv[0] in LOCAL_ONLY:
+        return None
+    if timeout is None:
+        timeout = float(os.environ.get("DSA_DAEMON_TIMEOUT", "2"))
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with conn:
+        try:
+            conn.settimeout(timeout)
+            conn.connect(sock_path)
+            if conn.recv(1) != _READY:
+                return None
+            conn.settimeout(None)
+            conn.sendall(json.dumps({"argv": argv, "cwd": os.getcwd()}).encode())
+            conn.shutdown(socket.SHUT_WR)
+        except OSError:  # unreachable, or busy past the timeout (socket.timeout is an OSError)
+            return None
+        resp = json.loads(_recv_all(conn) or b'{"code": 1, "stderr": "daemon closed the connection\\n"}')
+    if resp.get("local"):
+        return None
+    sys.stdout.write(resp.get("stdout", "")); sys.stdout.flush()
+    sys.stderr.write(resp.get("stderr", "")); sys.stderr.flush()
+    return int(resp.get("code", 0))
+
+def _run(argv: List[str], cwd: str) -> dict:
+    from .cli import run
+    from .profiling import PROFILER
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    prev, profiling = os.getcwd(), PROFILER.enabled
+    try:
+        os.chdir(cwd)
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                run(argv)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                if e.code is not None and not isinstance(e.code, int):
+                    print(e.code, file=sys.stderr)
+            except Exception as e:
+                code = 1
+                print(f"{type(e).__name__}: {e}", file=sys.stderr)
+    finally:
+        os.chdir(prev)
+        PROFILER.enabled = profiling
+        PROFILER.reset()
+    return {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+def serve(sock_path: str, preload=PRELOAD):
+    import importlib
+    for mod in preload:
+        try:
+            importlib.import_module(mod)
+        except ImportError:
+            pass
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(sock_path)
+    srv.listen(128)
+    print(json.dumps({"event": "daemon_ready", "socket": sock_path, "pid": os.getpid()}), flush=True)
+    try:
+        while True:
+            conn, _ = srv.accept()
+            with conn:
+                try:
+                    conn.sendall(_READY)
+                    raw = _recv_all(conn)
+                except OSError:
+                    continue  # client gave up waiting and runs the command itself
+                if not raw:
+                    continue
+                try:
+                    req = json.loads(raw)
+                    argv = list(req["argv"])
+                    if argv[:1] and argv[0] in LOCAL_ONLY:
+                        resp = {"local": True}
+                    else:
+                        resp = _run(argv, req.get("cwd") or os.getcwd())
+                except (ValueError, KeyError) as e:
+                    resp = {"code": 2, "stderr": f"bad daemon request: {e}\n"}
+                try:
+                    conn.sendall(json.dumps(resp).encode())
+                except OSError:
+                    pass  # client went away
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+        if os.path.exists(sock_path):
+            os.unlink(sock_path)
@@ -1,4 +1,5 @@
 
+import math
 from typing import Tuple
 import numpy as np
 
@@ -37,6 +38,45 @@ def ks_test(expected: np.ndarray, actual: np.ndarray) -> Tuple[float, float]:
         p = 2*np.exp(-2*(d*en)**2)
         return d, float(max(min(p,1.0),0.0))
 
+def _proportions(counts: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    counts = np.asarray(counts, dtype=float)
+    return np.where(counts == 0, eps, counts / max(1.0, counts.sum()))
+
+def categorical_psi(expected_counts: np.ndarray, actual_counts: np.ndarray) -> float:
+    """PSI over per-category counts (same zero-bin floor as ``population_stability_index``)."""
+    if np.sum(expected_counts) == 0 or np.sum(actual_counts) == 0:
+        return 0.0
+    e_pct = _proportions(expected_counts); a_pct = _proportions(actual_counts)
+    return float(np.sum((a_pct - e_pct) * np.log(a_pct / e_pct)))
+
+def chi_square_test(expected_counts: np.ndarray, actual_counts: np.ndarray) -> Tuple[float, float]:
+    """Chi-square test of homogeneity on the 2 x K table of category counts."""
+    table = np.vstack([expected_counts, actual_counts]).astype(float)
+    table = table[:, table.sum(axis=0) > 0]
+    if table.shape[1] < 2 or (table.sum(axis=1) == 0).any():
+        return 0.0, 1.0
+    try:
+        from scipy.stats import chi2_contingency
+        res = chi2_contingency(table, correction=False)
+        return float(res[0]), float(res[1])
+    except Exception:
+        # Fallback: manual statistic, Wilson–Hilferty approximation of the chi-square tail
+        exp = table.sum(axis=1, keepdims=True) * table.sum(axis=0, keepdims=True) / table.sum()
+        stat = float(np.sum((table - exp) ** 2 / exp))
+        k = table.shape[1] - 1
+        z = ((stat / k) ** (1 / 3) - (1 - 2 / (9 * k))) / np.sqrt(2 / (9 * k))
+        return stat, float(0.5 * math.erfc(z / np.sqrt(2)))
+
+def jensen_shannon(expected_counts: np.ndarray, actual_counts: np.ndarray) -> float:
+    """Jensen–Shannon distance (base 2, in [0, 1]) between the two category distributions."""
+    e = np.asarray(expected_counts, dtype=float); a = np.asarray(actual_counts, dtype=float)
+    if e.sum() == 0 or a.sum() == 0:
+        return 0.0
+    e /= e.sum(); a /= a.sum()
+    m = 0.5 * (e + a)
+    kl = lambda p: np.sum(p[p > 0] * np.log2(p[p > 0] / m[p > 0]))
+    return float(np.sqrt(max(0.0, 0.5 * kl(e) + 0.5 * kl(a))))
+
 class PageHinkley:
     """Concept drift detector (mean shift)"""
     def __init__(self, delta=0.005, lambda_=50, alpha=1.0):
@@ -3,11 +3,13 @@ from typing import Dict, Any, List
 import numpy as np
 import pandas as pd
 
+from .categorical import is_numeric
+
 def zscore_outliers(df: pd.DataFrame, cols: List[str], z: float = 3.5) -> Dict[str, List[int]]:
     """Return indices of rows that are outliers per column by absolute z-score > z."""
     out = {}
     for c in cols:
-        if not np.issubdtype(df[c].dtype, np.number): 
+        if not is_numeric(df[c]):
             continue
         vals = df[c].astype(float).values
         mu = np.nanmean(vals); sigma = np.nanstd(vals) or 1.0
@@ -16,3 +18,18 @@ def zscore_outliers(df: pd.DataFrame, cols: List[str], z: float = 3.5) -> Dict[s
         if idx:
             out[c] = idx
     return out
+
+def unseen_categories(df: pd.DataFrame, tables: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Return indices of rows whose value was not in the column's train-time category dictionary.
+
+    ``tables`` maps columns to ``categorical.CategoryTable``; hashed tables have no
+    dictionary and are skipped.
+    """
+    out = {}
+    for c, table in tables.items():
+        if c not in df.columns or table.other_code is None:
+            continue
+        idx = np.flatnonzero(table.encode(df[c]) == table.other_code).tolist()
+        if idx:
+            out[c] = idx
+    return out
@@ -0,0 +1,188 @@
+
+"""Asyncio runtime-guard gateway: audits dual-stream records inline with a latency budget.
+
+HTTP/1.1 (keep-alive) over TCP or a Unix socket:
+
+    POST /audit   body: one record {"answer", "monologue", "logits_topk"?}
+                  -> {"decision": "ALLOW"|"BLOCK", "reasons", "coherent", "latency_ms", "degraded"?}
+    GET  /stats   -> decision latency percentiles and counters
+    GET  /healthz -> {"ok": true}
+
+Audits run in an executor pool. At most ``max_inflight`` audits are admitted;
+further requests are shed immediately (503) and every audit has a
+``deadline_ms`` budget. Shed, timed-out and failed audits are decided by
+``fail_mode``: "open" allows the answer, "closed" blocks it. Bodies that are
+not a record of that shape get a 400 and are never audited.
+"""
+import asyncio, json, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from .coherence import CoherenceAuditor
+
+_AUDITOR: Optional[CoherenceAuditor] = None
+
+def _init_auditor(thresholds: Dict[str, Any]):
+    global _AUDITOR
+    _AUDITOR = CoherenceAuditor(thresholds)
+
+def _audit(rec: Dict[str, Any]) -> Dict[str, Any]:
+    return _AUDITOR.audit_record(rec)
+
+def _invalid(rec) -> Optional[str]:
+    """Why ``rec`` is not an auditable record (None if it is); such bodies get a 400, not ``fail_mode``."""
+    if not isinstance(rec, dict):
+        return "body must be a JSON object"
+    for key in ("answer", "monologue"):
+        if not isinstance(rec.get(key, ""), (str, type(None))):
+            return f"{key!r} must be a string"
+    if not isinstance(rec.get("logits_topk", []), (list, type(None))):
+        return "'logits_topk' must be a list"
+    return None
+
+class LatencyWindow:
+    """Decision latencies of the last ``size`` requests."""
+    def __init__(self, size: int = 10_000):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentiles(self, qs=(50, 90, 99, 99.9)) -> Dict[str, float]:
+        data = sorted(self.samples)
+        if not data:
+            return {}
+        return {f"p{q:g}_ms": data[min(len(data) - 1, int(len(data) * q / 100))] * 1e3 for q in qs}
+
+class GuardGateway:
+    def __init__(self, thresholds: Optional[Dict[str, Any]] = None, workers: int = 4, executor: str = "thread",
+                 max_inflight: int = 64, deadline_ms: float = 50.0, fail_mode: str = "closed", max_body: int = 1 << 20):
+        if fail_mode not in ("open", "closed"):
+            raise ValueError("fail_mode must be 'open' or 'closed'")
+        self.thresholds = thresholds or {"max_allowed_deception_tokens": 0, "max_allowed_conflict_markers": 0}
+        self.max_inflight = max_inflight
+        self.deadline = deadline_ms / 1e3
+        self.fail_mode = fail_mode
+        self.max_body = max_body
+        if executor == "process":
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_auditor, initargs=(self.thresholds,))
+        else:
+            # the auditor is stateless, so threads can share the module-level instance
+            _init_auditor(self.thresholds)
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="guard")
+        self.inflight = 0
+        self.latency = LatencyWindow()
+        self.counters = {"requests": 0, "allow": 0, "block": 0, "shed": 0, "timeout": 0, "error": 0}
+
+    def _fallback(self, why: str) -> Dict[str, Any]:
+        return {"decision": "ALLOW" if self.fail_mode == "open" else "BLOCK", "reasons": [f"guard degraded: {why}"],
+                "coherent": None, "degraded": why}
+
+    async def decide(self, rec: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        t0 = time.perf_counter()
+        self.counters["requests"] += 1
+        status = 200
+        if self.inflight >= self.max_inflight:
+            self.counters["shed"] += 1
+            status, out = 503, self._fallback("overloaded")
+        else:
+            # a timed-out audit keeps its worker busy, so it stays in flight until the pool finishes it
+            self.inflight += 1
+            fut = asyncio.get_running_loop().run_in_executor(self.pool, _audit, rec)
+            fut.add_done_callback(self._release)
+            try:
+                res = await asyncio.wait_for(asyncio.shield(fut), timeout=self.deadline)
+                out = {"decision": "ALLOW" if res["coherent"] else "BLOCK", "reasons": res["reasons"], "coherent": res["coherent"]}
+            except asyncio.TimeoutError:
+                self.counters["timeout"] += 1
+                out = self._fallback("deadline_exceeded")
+            except Exception as e:
+                self.counters["error"] += 1
+                out = self._fallback(f"error: {type(e).__name__}")
+        self.counters["allow" if out["decision"] == "ALLOW" else "block"] += 1
+        dt = time.perf_counter() - t0
+        self.latency.add(dt)
+        out["latency_ms"] = dt * 1e3
+        return status, out
+
+    def _release(self, fut):
+        self.inflight -= 1
+        if not fut.cancelled():
+            fut.exception()  # retrieved here so abandoned (timed-out) failures are not logged as unhandled
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "inflight": self.inflight, "window": len(self.latency.samples), **self.latency.percentiles()}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, version = (lines[0].split(" ") + ["", "", ""])[:3]
+                headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+                raw_length = headers.get("content-length", "0") or "0"
+                if not (raw_length.isascii() and raw_length.isdigit()):  # negative, non-integer, "²"
+                    await self._send(writer, 400, {"error": "invalid Content-Length"}, close=True)
+                    break
+                length = int(raw_length)
+                if length > self.max_body:
+                    await self._send(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if method == "POST" and path == "/audit":
+                    try:
+                        rec = json.loads(body)
+                    except ValueError:
+                        status, out = 400, {"error": "invalid JSON"}
+                    else:
+                        why = _invalid(rec)
+                        status, out = (400, {"error": why}) if why else await self.decide(rec)
+                elif method == "GET" and path == "/stats":
+                    status, out = 200, self.stats()
+                elif method == "GET" and path == "/healthz":
+                    status, out = 200, {"ok": True}
+                else:
+                    status, out = 404, {"error": "not found"}
+                await self._send(writer, status, out, close=not keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # server shutting down; the connection task ends here
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, status: int, obj: Dict[str, Any], close: bool = False):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 503: "Service Unavailable"}[status]
+        body = json.dumps(obj, ensure_ascii=False).encode()
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8787, unix_path: Optional[str] = None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def run(host: str = "127.0.0.1", port: int = 8787, unix_path: Optional[str] = None, **kwargs):
+    gw = GuardGateway(**kwargs)
+    try:
+        asyncio.run(gw.serve(host, port, unix_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps({"event": "guard_stopped", **gw.stats()}))
+        gw.close()
@@ -1,40 +1,191 @@
 
-import os, json, hashlib, time, pickle
-from dataclasses import dataclass, asdict
+import os, re, json, hashlib, time, pickle, sqlite3, threading, uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
+
+_BUF_SIZE = 1 << 20  # 1 MiB I/O buffers for model artifacts
 
 def _sha256_path(path: Union[str, Path]) -> str:
     path = Path(path)
     h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+    with path.open("rb", buffering=0) as f:
+        for chunk in iter(lambda: f.read(_BUF_SIZE), b""):
             h.update(chunk)
     return h.hexdigest()
 
+class _HashingWriter:
+    """Write-through file wrapper that updates a sha256 digest as bytes are written."""
+    def __init__(self, f):
+        self.f = f
+        self.h = hashlib.sha256()
+    def write(self, b) -> int:
+        self.h.update(b)
+        return self.f.write(b)
+    def tell(self) -> int:
+        return self.f.tell()
+    def flush(self):
+        self.f.flush()
+    def hexdigest(self) -> str:
+        return self.h.hexdigest()
+
+def _dump(model, f) -> str:
+    """Serialize ``model`` into the binary file ``f`` and return the sha256 of the bytes written."""
+    w = _HashingWriter(f)
+    try:
+        import joblib
+        joblib.dump(model, w)
+    except ImportError:
+        pickle.dump(model, w, protocol=pickle.HIGHEST_PROTOCOL)
+    return w.hexdigest()
+
+@contextmanager
+def _replacing(path_obj: Path, mode: str = "wb"):
+    """Write to a temp file next to ``path_obj`` and ``os.replace`` it into place on success.
+
+    Readers never see a partial file, and processes that already mapped or opened
+    the old file keep reading the old inode.
+    """
+    tmp = path_obj.with_name(f".{path_obj.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, mode, buffering=_BUF_SIZE if "b" in mode else -1) as f:
+            yield f
+        os.replace(tmp, path_obj)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
 def save_model(model, path: Union[str, Path], meta: Dict[str, Any]):
     path_obj = Path(path)
     path_obj.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        import joblib
-        joblib.dump(model, path_obj)
-    except Exception:
-        with path_obj.open("wb") as f:
-            pickle.dump(model, f)
-    record = {"path": str(path_obj), "sha256": _sha256_path(path_obj), "saved_at": time.time(), **meta}
-    meta_path = path_obj.with_suffix(path_obj.suffix + ".meta.json")
-    with meta_path.open("w") as mf:
+    with _replacing(path_obj) as f:
+        sha = _dump(model, f)
+    record = {"path": str(path_obj), "sha256": sha, "saved_at": time.time(), **meta}
+    with _replacing(path_obj.with_suffix(path_obj.suffix + ".meta.json"), "w") as mf:
         json.dump(record, mf, indent=2)
+    with _CACHE_LOCK:
+        _STAT_CACHE[os.path.abspath(path_obj)] = (_stat_key(path_obj), sha)
     return record
 
-def load_model(path: str):
+# Process-wide load cache: (sha256, mmap_mode) -> model (LRU), plus path -> (stat, sha256) so an
+# unchanged file is not re-hashed on every call.
+_MODEL_CACHE: "OrderedDict[str, Any]" = OrderedDict()
+_STAT_CACHE: Dict[str, Any] = {}
+_CACHE_LOCK = threading.Lock()
+MODEL_CACHE_SIZE = 4
+_VERIFY_ATTEMPTS = 5
+
+def _stat_key(path) -> tuple:
+    st = os.stat(path)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def model_meta(path: str) -> Dict[str, Any]:
+    """The ``.meta.json`` sidecar saved next to ``path`` ({} if there is none)."""
+    meta_path = path + ".meta.json"
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r") as f:
+        return json.load(f)
+
+def _expected_sha256(path: str) -> Optional[str]:
+    return model_meta(path).get("sha256")
+
+def _load(path: str, mmap_mode: Optional[str] = None):
     try:
         import joblib
-        return joblib.load(path)
+    except ImportError:
+        with open(path, "rb", buffering=_BUF_SIZE) as f:
+            return pickle.load(f)
+    try:
+        return joblib.load(path, mmap_mode=mmap_mode)
     except Exception:
-        with open(path, "rb") as f:
+        # artifacts written by plain pickle
+        with open(path, "rb", buffering=_BUF_SIZE) as f:
             return pickle.load(f)
 
+def load_model(path: str, mmap_mode: Optional[str] = None, cache: bool = False, sha256: Optional[str] = None):
+    """Load a model artifact.
+
+    ``mmap_mode`` ("r" or "c") memory-maps numpy arrays inside joblib artifacts
+    instead of reading them into memory. With ``cache=True`` the loaded model is
+    kept in a process-wide LRU keyed by sha256; the file is verified against
+    ``sha256`` (or the ``.meta.json`` sidecar written by ``save_model``) and a
+    mismatch raises ``ValueError``.
+    """
+    if not cache and sha256 is None:
+        return _load(path, mmap_mode)
+    path = os.path.abspath(str(path))
+    for attempt in range(_VERIFY_ATTEMPTS):
+        expected = sha256 or _expected_sha256(path)
+        key = _stat_key(path)
+        with _CACHE_LOCK:
+            known = _STAT_CACHE.get(path)
+        actual = known[1] if known and known[0] == key else _sha256_path(path)
+        if not expected or actual == expected or sha256 is not None:
+            break
+        # save_model replaces the artifact, then its sidecar: we may have read one from each save
+        time.sleep(0.02 * (attempt + 1))
+    if expected and actual != expected:
+        raise ValueError(f"sha256 mismatch for {path}: expected {expected}, got {actual}")
+    with _CACHE_LOCK:
+        _STAT_CACHE[path] = (key, actual)
+        if cache and (actual, mmap_mode) in _MODEL_CACHE:
+            _MODEL_CACHE.move_to_end((actual, mmap_mode))
+            return _MODEL_CACHE[(actual, mmap_mode)]
+    model = _load(path, mmap_mode)
+    if cache:
+        with _CACHE_LOCK:
+            _MODEL_CACHE[(actual, mmap_mode)] = model
+            while len(_MODEL_CACHE) > MODEL_CACHE_SIZE:
+                _MODEL_CACHE.popitem(last=False)
+    return model
+
+def clear_model_cache():
+    with _CACHE_LOCK:
+        _MODEL_CACHE.clear()
+        _STAT_CACHE.clear()
+
+def next_version(latest: Optional[str]) -> str:
+    if not latest:
+        return "v0.1.0"
+    m = re.match(r"^(.*?)(\d+)$", latest)
+    return f"{m.group(1)}{int(m.group(2)) + 1}" if m else f"{latest}.1"
+
+def save_registered(model, registry: "ModelRegistry", models_dir: str, metrics: Dict[str, Any],
+                    meta: Optional[Dict[str, Any]] = None) -> "RegistryItem":
+    """Save ``model`` as ``models_dir/<sha256[:16]>.joblib`` and register it under the next free version.
+
+    Artifacts are content-addressed, so a registered file is never overwritten:
+    identical bytes reuse the stored file and anything else gets a new name.
+    """
+    d = Path(models_dir)
+    d.mkdir(parents=True, exist_ok=True)
+    pending = d / f".pending.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with pending.open("xb", buffering=_BUF_SIZE) as f:
+            sha = _dump(model, f)
+        path = d / f"{sha[:16]}.joblib"
+        if path.exists():
+            pending.unlink()
+        else:
+            os.replace(pending, path)
+    except BaseException:
+        if pending.exists():
+            pending.unlink()
+        raise
+    item = registry.register(str(path), sha, metrics)
+    record = {"path": str(path), "sha256": sha, "saved_at": item.created_at, "version": item.version,
+              **(meta or {}), "metrics": metrics}
+    with _replacing(path.with_suffix(path.suffix + ".meta.json"), "w") as mf:
+        json.dump(record, mf, indent=2)
+    with _CACHE_LOCK:
+        _STAT_CACHE[os.path.abspath(path)] = (_stat_key(path), sha)
+    return item
+
 @dataclass
 class RegistryItem:
     version: str
@@ -44,24 +195,132 @@ class RegistryItem:
     metrics: Dict[str, Any]
 
 class ModelRegistry:
-    def __init__(self, root: str):
+    """SQLite-backed model registry.
+
+    SQLite gives us file locking across processes, so concurrent trainers can
+    register models without losing entries. ``latest()`` is a single indexed
+    lookup. A legacy ``registry.json`` found in ``root`` is imported once.
+    """
+    def __init__(self, root: str, timeout: float = 30.0):
         self.root = root
         os.makedirs(root, exist_ok=True)
-        self.index_path = os.path.join(root, "registry.json")
-        if not os.path.exists(self.index_path):
-            with open(self.index_path, "w") as f:
-                json.dump({"models": []}, f)
+        self.db_path = os.path.join(root, "registry.sqlite")
+        self.index_path = os.path.join(root, "registry.json")  # legacy format
+        self.timeout = timeout
+        with self._connect() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                version TEXT NOT NULL, path TEXT NOT NULL, sha256 TEXT NOT NULL,
+                created_at REAL NOT NULL, metrics TEXT NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_models_version ON models(version)")
+            try:
+                con.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_models_version ON models(version)")
+            except sqlite3.IntegrityError:
+                pass  # older registries may already hold duplicates; register() still never adds one
+            con.execute("CREATE INDEX IF NOT EXISTS ix_models_sha256 ON models(sha256)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.migrate_json()
+
+    def _connect(self, write: bool = True) -> "_Tx":
+        con = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        return _Tx(con, write)
+
+    @staticmethod
+    def _row(row) -> RegistryItem:
+        _, version, path, sha, created_at, metrics = row
+        return RegistryItem(version=version, path=path, sha256=sha, created_at=created_at, metrics=json.loads(metrics))
+
+    def migrate_json(self, path: Optional[str] = None) -> int:
+        """Import entries from a legacy ``registry.json``; returns how many were added."""
+        path = path or self.index_path
+        if not os.path.exists(path):
+            return 0
+        key = "migrated:" + os.path.abspath(path)
+        with self._connect() as con:
+            if con.execute("SELECT 1 FROM meta WHERE key=?", (key,)).fetchone():
+                return 0
+            with open(path, "r") as f:
+                models = json.load(f).get("models", [])
+            for m in models:
+                self._insert(con, RegistryItem(**m))
+            con.execute("INSERT INTO meta(key, value) VALUES (?, ?)", (key, str(time.time())))
+        return len(models)
+
+    @staticmethod
+    def _insert(con, item: RegistryItem):
+        con.execute("INSERT INTO models(version, path, sha256, created_at, metrics) VALUES (?, ?, ?, ?, ?)",
+                    (item.version, item.path, item.sha256, float(item.created_at), json.dumps(item.metrics)))
 
     def add(self, item: RegistryItem):
-        with open(self.index_path, "r") as f:
-            idx = json.load(f)
-        idx["models"].append(asdict(item))
-        with open(self.index_path, "w") as f:
-            json.dump(idx, f, indent=2)
+        with self._connect() as con:
+            self._insert(con, item)
+
+    def register(self, path: str, sha256: str, metrics: Dict[str, Any], created_at: Optional[float] = None) -> RegistryItem:
+        """Add an entry under the next free version, allocated inside the write transaction."""
+        with self._connect() as con:
+            row = con.execute("SELECT version FROM models ORDER BY id DESC LIMIT 1").fetchone()
+            version = next_version(row[0] if row else None)
+            while con.execute("SELECT 1 FROM models WHERE version=?", (version,)).fetchone():
+                version = next_version(version)
+            item = RegistryItem(version=version, path=path, sha256=sha256,
+                                created_at=time.time() if created_at is None else created_at, metrics=metrics)
+            self._insert(con, item)
+        return item
 
     def latest(self) -> Optional[RegistryItem]:
-        with open(self.index_path, "r") as f:
-            idx = json.load(f)
-        if not idx["models"]: return None
-        last = idx["models"][-1]
-        return RegistryItem(**last)
+        with self._connect(write=False) as con:
+            row = con.execute("SELECT * FROM models ORDER BY id DESC LIMIT 1").fetchone()
+        return self._row(row) if row else None
+
+    def last(self, n: int) -> List[RegistryItem]:
+        """Return the ``n`` most recent entries, newest first."""
+        with self._connect(write=False) as con:
+            rows = con.execute("SELECT * FROM models ORDER BY id DESC LIMIT ?", (int(n),)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def get(self, version: str) -> Optional[RegistryItem]:
+        """Most recent entry registered under ``version``."""
+        with self._connect(write=False) as con:
+            row = con.execute("SELECT * FROM models WHERE version=? ORDER BY id DESC LIMIT 1", (version,)).fetchone()
+        return self._row(row) if row else None
+
+    def by_sha256(self, sha256: str) -> List[RegistryItem]:
+        with self._connect(write=False) as con:
+            rows = con.execute("SELECT * FROM models WHERE sha256=? ORDER BY id", (sha256,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def find(self, metric: str, min_value: Optional[float] = None, max_value: Optional[float] = None) -> List[RegistryItem]:
+        """Entries whose ``metrics[metric]`` lies within ``[min_value, max_value]``."""
+        expr = "json_extract(metrics, ?)"
+        sql, params = f"SELECT * FROM models WHERE {expr} IS NOT NULL", [f'$."{metric}"']
+        if min_value is not None:
+            sql += f" AND {expr} >= ?"; params += [f'$."{metric}"', float(min_value)]
+        if max_value is not None:
+            sql += f" AND {expr} <= ?"; params += [f'$."{metric}"', float(max_value)]
+        with self._connect(write=False) as con:
+            rows = con.execute(sql + " ORDER BY id", params).fetchall()
+        return [self._row(r) for r in rows]
+
+    def __len__(self) -> int:
+        with self._connect(write=False) as con:
+            return con.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+class _Tx:
+    """Connection wrapper: commit/rollback and close on exit.
+
+    Writers take ``BEGIN IMMEDIATE`` so they serialize; readers use a deferred
+    transaction, which under WAL reads a snapshot without blocking or being blocked.
+    """
+    def __init__(self, con: sqlite3.Connection, write: bool = True):
+        self.con = con
+        self.write = write
+    def __enter__(self):
+        self.con.execute("BEGIN IMMEDIATE" if self.write else "BEGIN DEFERRED")
+        return self.con
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.con.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.con.close()
+        return False
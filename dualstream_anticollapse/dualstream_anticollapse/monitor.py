@@ -1,14 +1,18 @@
 
-import os, json
+import os, json, time
 from dataclasses import dataclass, asdict
 from typing import Dict, Any, List, Optional
-import numpy as np
 import pandas as pd
 
 from .metrics import classification_metrics
-from .drift import population_stability_index, ks_test, PageHinkley
+from .drift import population_stability_index, ks_test, categorical_psi, chi_square_test, jensen_shannon, PageHinkley
+from .categorical import CategoryTable, is_categorical
 from .alerts import emit
-from .coherence import CoherenceAuditor
+from .coherence import audit_records
+from .profiling import PROFILER
+
+# state.json is rewritten on every `monitor` run; only the newest events are kept (RetrainPolicy uses the counters)
+MAX_EVENTS = 100
 
 @dataclass
 class MonitorState:
@@ -16,12 +20,18 @@ class MonitorState:
     last_retrain_batch: int = -1
     events: List[Dict[str, Any]] = None
 
-from .edge import zscore_outliers
+from .edge import zscore_outliers, unseen_categories
 
 class ModelMonitor:
-    def __init__(self, cfg, baseline_stats: Dict[str, Any], state_path: str, alert_sink: Optional[str]="stdout"):
+    def __init__(self, cfg, baseline_stats: Dict[str, Any], state_path: str, alert_sink: Optional[str]="stdout",
+                 categories: Optional[Dict[str, CategoryTable]] = None, drift_workers: int = 0):
         self.cfg = cfg
         self.baseline = baseline_stats
+        # train-time category dictionaries / reference frequencies (categorical.load_categories)
+        self.categories = categories or {}
+        # >0: numeric drift tests run on a process pool over shared memory (drift_parallel)
+        self.drift_workers = drift_workers
+        self.drift_timings: List[Dict[str, Any]] = []
         self.state_path = state_path
         self.alert_sink = alert_sink
         self.state = MonitorState(batches_seen=0, last_retrain_batch=-1, events=[])
@@ -33,6 +43,7 @@ class ModelMonitor:
 
     def save_state(self):
         os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        del self.state.events[:-MAX_EVENTS]
         with open(self.state_path, "w") as f:
             json.dump(asdict(self.state), f, indent=2)
 
@@ -57,12 +68,30 @@ class ModelMonitor:
     def check_drift(self, ref: pd.DataFrame, cur: pd.DataFrame) -> bool:
         th = self.cfg.thresholds
         feats = self._feature_cols(ref)
-        drifted = []
+        categorical = {c for c in feats if c in self.categories or is_categorical(ref[c])}
+        numeric = [c for c in feats if c not in categorical]
+        pooled = {}
+        if self.drift_workers and len(numeric) > 1:
+            from .drift_parallel import parallel_numeric_drift
+            for r in parallel_numeric_drift(ref, cur, numeric, max_workers=self.drift_workers):
+                PROFILER.add("drift.feature", r["seconds"], items=len(cur), feature=r["feature"])
+                pooled[r["feature"]] = r
+        drifted, self.drift_timings = [], []
         for col in feats:
-            if not np.issubdtype(ref[col].dtype, np.number): 
+            t0 = time.perf_counter()
+            if col in categorical:
+                drifted.extend(self._categorical_drift(col, ref, cur))
+                self.drift_timings.append({"feature": col, "seconds": time.perf_counter() - t0})
                 continue
-            psi = population_stability_index(ref[col].values, cur[col].values)
-            ksD, p = ks_test(ref[col].values, cur[col].values)
+            if col in pooled:
+                r = pooled[col]
+                psi, p = r["psi"], r["ks_pvalue"]
+                self.drift_timings.append({"feature": col, "seconds": r["seconds"], "pid": r["pid"]})
+            else:
+                with PROFILER.span("drift.feature", items=len(cur), feature=col):
+                    psi = population_stability_index(ref[col].values, cur[col].values)
+                    ksD, p = ks_test(ref[col].values, cur[col].values)
+                self.drift_timings.append({"feature": col, "seconds": time.perf_counter() - t0})
             if psi >= th.psi or p < th.ks_pvalue:
                 drifted.append({"feature": col, "psi": float(psi), "ks_pvalue": float(p)})
         if drifted:
@@ -71,6 +100,21 @@ class ModelMonitor:
             return True
         return False
 
+    def _categorical_drift(self, col: str, ref: pd.DataFrame, cur: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Drift of one categorical column; reference frequencies come from the train-time table when there is one."""
+        th = self.cfg.thresholds
+        with PROFILER.span("drift.feature", items=len(cur), feature=col):
+            table = self.categories.get(col)
+            if table is None or table.ref_counts is None:
+                table = CategoryTable.fit(ref[col])
+            ref_counts, cur_counts = table.ref_counts, table.counts(cur[col])
+            psi = categorical_psi(ref_counts, cur_counts)
+            _, p = chi_square_test(ref_counts, cur_counts)
+            js = jensen_shannon(ref_counts, cur_counts)
+        if psi >= th.psi or p < th.chi2_pvalue or js >= th.js_distance:
+            return [{"feature": col, "psi": float(psi), "chi2_pvalue": float(p), "js_distance": float(js)}]
+        return []
+
     def check_concept_drift(self, y_losses: List[float]) -> bool:
         changed = any(self.ph.update(float(l)) for l in y_losses)
         if changed:
@@ -79,21 +123,12 @@ class ModelMonitor:
         return changed
 
     def audit_dual_streams(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        auditor = CoherenceAuditor(thresholds={
-            "max_allowed_deception_tokens": self.cfg.thresholds.max_allowed_deception_tokens,
-            "max_allowed_conflict_markers": self.cfg.thresholds.max_allowed_conflict_markers,
-        })
-        results = []
-        for rec in records:
-            out = auditor.audit_record(rec)
-            if not out["coherent"]:
-                emit("coherence_violation", out, sink=self.alert_sink)
-            results.append(out)
-        return results
+        return audit_records(records, thresholds=self.cfg.thresholds.coherence(), alert_sink=self.alert_sink)
 
     def check_outliers(self, df):
         feats = self._feature_cols(df)
         out = zscore_outliers(df, feats, z=3.5)
+        out.update(unseen_categories(df, {c: t for c, t in self.categories.items() if c in feats}))
         if out:
             emit("outliers_detected", {"columns": list(out.keys()), "counts": {k: len(v) for k,v in out.items() }}, sink=self.alert_sink)
             self.state.events.append({"type":"outliers", "details": {k: len(v) for k,v in out.items()}})
@@ -0,0 +1,160 @@
+
+"""Named timing spans and counters with Prometheus-text and JSON export.
+
+Disabled by default (or enable with ``DSA_PROFILE=1``); a disabled ``span()``
+returns a shared no-op context manager, so instrumented hot loops pay only an
+attribute check and a call.
+
+    from .profiling import PROFILER
+    with PROFILER.span("drift.feature", feature=col):
+        ...
+    PROFILER.count("records_audited", len(records))
+"""
+import json, os, threading, time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("prof", "key", "items", "t0")
+    def __init__(self, prof, key, items):
+        self.prof = prof; self.key = key; self.items = items
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+    def __exit__(self, *exc):
+        self.prof._record(self.key, time.perf_counter_ns() - self.t0, self.items)
+        return False
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+class Profiler:
+    def __init__(self, enabled: bool = False, prefix: str = "dsa"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._spans: Dict[Tuple, list] = {}   # key -> [calls, total_ns, max_ns, items]
+            self._counters: Dict[Tuple, float] = {}
+
+    def span(self, name: str, items: int = 0, **labels):
+        """Time a block under ``name``; ``items`` counts work done (records, tokens) for throughput."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, _key(name, labels), items)
+
+    def add(self, name: str, seconds: float, items: int = 0, **labels):
+        """Record a span timed elsewhere (e.g. in a worker process)."""
+        if not self.enabled:
+            return
+        self._record(_key(name, labels), int(seconds * 1e9), items)
+
+    def count(self, name: str, n: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def _record(self, key, ns: int, items: int):
+        with self._lock:
+            s = self._spans.get(key)
+            if s is None:
+                self._spans[key] = [1, ns, ns, items]
+            else:
+                s[0] += 1; s[1] += ns; s[3] += items
+                if ns > s[2]:
+                    s[2] = ns
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {k: list(v) for k, v in self._spans.items()}
+            counters = dict(self._counters)
+        out = {"spans": [], "counters": []}
+        for (name, labels), (calls, total, mx, items) in sorted(spans.items()):
+            row = {"span": name, "labels": dict(labels), "calls": calls, "total_s": total / 1e9,
+                   "mean_s": total / calls / 1e9, "max_s": mx / 1e9}
+            if items:
+                row["items"] = items
+                row["items_per_s"] = items / (total / 1e9) if total else None
+            out["spans"].append(row)
+        for (name, labels), value in sorted(counters.items()):
+            out["counters"].append({"counter": name, "labels": dict(labels), "value": value})
+        return out
+
+    def to_prometheus(self) -> str:
+        p = self.prefix
+        s = self.summary()
+        lines = []
+        def metric(name, kind, help_, rows):
+            lines.append(f"# HELP {p}_{name} {help_}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.extend(f"{p}_{name}{_labels(lbl)} {val!r}" for lbl, val in rows)
+        span_lbl = lambda r: {"span": r["span"], **r["labels"]}
+        metric("span_seconds_total", "counter", "Total seconds spent in span.", [(span_lbl(r), r["total_s"]) for r in s["spans"]])
+        metric("span_calls_total", "counter", "Number of times the span ran.", [(span_lbl(r), r["calls"]) for r in s["spans"]])
+        metric("span_max_seconds", "gauge", "Slowest single run of the span.", [(span_lbl(r), r["max_s"]) for r in s["spans"]])
+        metric("span_items_total", "counter", "Items processed inside the span.", [(span_lbl(r), r["items"]) for r in s["spans"] if "items" in r])
+        metric("counter_total", "counter", "Named event counters.", [({"counter": r["counter"], **r["labels"]}, r["value"]) for r in s["counters"]])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the text exposition format atomically (safe for node_exporter's textfile collector)."""
+        _atomic_write(path, self.to_prometheus())
+
+    def write_json(self, path: str):
+        _atomic_write(path, json.dumps(self.summary(), indent=2))
+
+def _labels(lbl: Dict[str, Any]) -> str:
+    if not lbl:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in lbl.items()) + "}"
+
+def _atomic_write(path: str, text: str):
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+@contextmanager
+def cprofile_to(path: Optional[str]):
+    """Run the block under cProfile and dump stats to ``path`` (no-op when ``path`` is falsy)."""
+    if not path:
+        yield
+        return
+    import cProfile
+    pr = cProfile.Profile()
+    pr.enable()
+    try:
+        yield
+    finally:
+        pr.disable()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        pr.dump_stats(path)
+
+# Process-wide profiler used by the instrumented modules.
+PROFILER = Profiler(enabled=os.environ.get("DSA_PROFILE", "") not in ("", "0"))
@@ -1,5 +1,7 @@
 
-from typing import Tuple, Dict, Any
+import os, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional
 import numpy as np
 
 def build_model(kind: str):
@@ -36,3 +38,137 @@ def predict(model, X):
         proba = 1/(1+np.exp(-raw))
     pred = (proba >= 0.5).astype(int)
     return pred, proba
+
+def iter_csv_chunks(path: str, target: str, features: Optional[List[str]] = None, id_column: Optional[str] = None,
+                    chunksize: int = 100_000) -> Iterator[Tuple[Any, np.ndarray]]:
+    """Stream ``(X, y)`` chunks from a CSV without loading the whole file."""
+    import pandas as pd
+    for df in pd.read_csv(path, chunksize=chunksize):
+        X = df[features] if features else df.drop(columns=[c for c in [target, id_column] if c])
+        yield X, df[target].astype(int).values
+
+MODEL_TYPES = {"SGDClassifier": "sgd_classifier", "RandomForestClassifier": "random_forest"}
+
+def model_type_of(model, default: str = "sgd_classifier") -> str:
+    """``build_model`` kind that produced ``model``."""
+    return MODEL_TYPES.get(type(model).__name__, default)
+
+def fit_stream(model, chunks: Iterable[Tuple[Any, np.ndarray]], classes=(0, 1)):
+    """Fit over a chunk stream: one ``partial_fit`` per chunk when supported.
+
+    Models without ``partial_fit`` (e.g. random forests) cannot train out-of-core;
+    their chunks are concatenated and passed to a single ``fit``.
+    """
+    classes = np.asarray(classes)
+    if hasattr(model, "partial_fit"):
+        for X, y in chunks:
+            model.partial_fit(X, y, classes=classes)
+        return model
+    import pandas as pd
+    Xs, ys = zip(*chunks)
+    return fit_model(model, pd.concat(Xs, ignore_index=True), np.concatenate(ys))
+
+def should_retrain(policy, batches_seen: int, last_retrain_batch: int, drift: bool = False, performance: bool = False) -> bool:
+    """Apply a ``RetrainPolicy`` to the current batch counters and monitoring signals."""
+    since = batches_seen - last_retrain_batch if last_retrain_batch >= 0 else batches_seen
+    if policy.kind == "scheduled":
+        return since >= policy.schedule_every_n_batches
+    return (drift or performance) and since >= policy.min_batches_between_retrains
+
+def count_rows(path: str, target: str, chunksize: int = 100_000) -> int:
+    import pandas as pd
+    return sum(len(c) for c in pd.read_csv(path, usecols=[target], chunksize=chunksize))
+
+def _train_candidate(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool worker: stream the training CSV into one candidate, then score it on held-out rows.
+
+    Rows from ``holdout_start`` on (the newest ones) are skipped during training
+    and scored in a second streaming pass, so only labels and predictions are
+    kept in memory.
+    """
+    from .governance import load_model
+    from .metrics import classification_metrics
+    model = load_model(spec["warm_path"]) if spec.get("warm_path") else build_model(spec["model_type"])
+    start = spec["holdout_start"]
+    def stream():
+        offset = 0
+        for X, y in iter_csv_chunks(spec["path"], spec["target"], spec["features"], spec["id_column"], spec["chunksize"]):
+            yield X, y, np.arange(offset, offset + len(y)) >= start
+            offset += len(y)
+    t0 = time.perf_counter()
+    model = fit_stream(model, ((X[~held], y[~held]) for X, y, held in stream() if not held.all()), classes=spec["classes"])
+    fit_seconds = time.perf_counter() - t0
+    ys, preds, probas = [], [], []
+    for X, y, held in stream():
+        if held.any():
+            pred, proba = predict(model, X[held])
+            ys.append(y[held]); preds.append(pred); probas.append(proba)
+    if not ys:
+        raise ValueError(f"no rows of {spec['path']} at or after row {start} to score candidates on")
+    metrics = classification_metrics(np.concatenate(ys), np.concatenate(preds), np.concatenate(probas))
+    return {"name": spec["name"], "model": model, "metrics": metrics, "fit_seconds": fit_seconds}
+
+class RetrainEngine:
+    """Out-of-core retraining driven by ``cfg.retrain`` (a ``RetrainPolicy``).
+
+    Candidates (a warm start from the registry's latest model plus fresh models)
+    stream the training data through ``partial_fit`` in a process pool; the best
+    one by ``select_metric`` on the newest 1/``holdout_every`` of the rows, held
+    out of training, is saved and registered. The warm start is only a candidate
+    if the latest model was never trained on those rows (its sidecar records the
+    file and row count it was trained on), so the registered metrics are always
+    out-of-sample. The registry's latest version is the one ``monitor`` serves,
+    so registering promotes it.
+    """
+    def __init__(self, cfg, registry, chunksize: int = 100_000, holdout_every: int = 10,
+                 select_metric: str = "f1", max_workers: Optional[int] = None, alert_sink: Optional[str] = "stdout"):
+        if holdout_every < 2:
+            raise ValueError("holdout_every must be >= 2 (the newest 1/holdout_every of the rows are held out)")
+        self.cfg = cfg
+        self.registry = registry
+        self.chunksize = chunksize
+        self.holdout_every = holdout_every
+        self.select_metric = select_metric
+        self.max_workers = max_workers
+        self.alert_sink = alert_sink
+
+    def candidates(self, train_csv: str, holdout_start: int) -> List[Dict[str, Any]]:
+        from .governance import model_meta
+        specs = [{"name": f"fresh_{self.cfg.model_type}", "model_type": self.cfg.model_type}]
+        latest = self.registry.latest()
+        if latest and os.path.exists(latest.path) and self.cfg.model_type == "sgd_classifier":
+            seen = model_meta(latest.path).get("data") or {}
+            if seen.get("path") == os.path.abspath(train_csv) and seen.get("trained_rows", holdout_start + 1) <= holdout_start:
+                specs.insert(0, {"name": f"warm_{latest.version}", "model_type": self.cfg.model_type, "warm_path": latest.path})
+        return specs
+
+    def retrain(self, train_csv: str, classes=(0, 1)) -> Dict[str, Any]:
+        from .governance import save_registered
+        from .alerts import emit
+        n_rows = count_rows(train_csv, self.cfg.target, self.chunksize)
+        holdout_start = n_rows - n_rows // self.holdout_every
+        if holdout_start == n_rows:
+            raise ValueError(f"{train_csv} has {n_rows} rows; need at least holdout_every={self.holdout_every}")
+        common = {"path": train_csv, "target": self.cfg.target, "features": self.cfg.features, "id_column": self.cfg.id_column,
+                  "chunksize": self.chunksize, "holdout_start": holdout_start, "classes": list(classes)}
+        specs = [{**common, **c} for c in self.candidates(train_csv, holdout_start)]
+        with ProcessPoolExecutor(max_workers=self.max_workers or min(len(specs), os.cpu_count() or 1)) as ex:
+            results = list(ex.map(_train_candidate, specs))
+        best = max(results, key=lambda r: r["metrics"].get(self.select_metric, 0.0))
+        item = save_registered(best["model"], self.registry, os.path.join(self.cfg.output_dir, "models"), best["metrics"],
+                               {"stage": "retrain", "candidate": best["name"],
+                                "data": {"path": os.path.abspath(train_csv), "trained_rows": holdout_start}})
+        summary = {"version": item.version, "path": item.path, "winner": best["name"], "holdout_rows": n_rows - holdout_start,
+                   "candidates": {r["name"]: {"metrics": r["metrics"], "fit_seconds": r["fit_seconds"]} for r in results}}
+        emit("model_retrained", summary, sink=self.alert_sink)
+        return summary
+
+    def maybe_retrain(self, monitor, train_csv: str, drift: bool = False, performance: bool = False) -> Optional[Dict[str, Any]]:
+        """Retrain if ``cfg.retrain`` allows it at ``monitor.state.batches_seen``; updates the monitor state."""
+        st = monitor.state
+        if not should_retrain(self.cfg.retrain, st.batches_seen, st.last_retrain_batch, drift, performance):
+            return None
+        summary = self.retrain(train_csv)
+        st.last_retrain_batch = st.batches_seen
+        st.events.append({"type": "retrain", "version": summary["version"], "winner": summary["winner"]})
+        return summary
@@ -0,0 +1,53 @@
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from .governance import RegistryItem, load_model
+from .metrics import classification_metrics
+from .sharedmem import SHARED, shared_block, attach
+
+def _score(item: Dict[str, Any]):
+    from .retrain import predict
+    X = SHARED["X"]
+    if SHARED["columns"] is not None:
+        import pandas as pd
+        X = pd.DataFrame(X, columns=SHARED["columns"], copy=False)
+    model = load_model(item["path"], cache=True, sha256=item["sha256"])
+    return predict(model, X)
+
+def shadow_score(items: List[RegistryItem], X, y=None, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Score one batch with several registered models in parallel.
+
+    ``X`` is copied once into shared memory; each worker process maps it
+    read-only instead of receiving a pickled copy. Returns per-version metrics
+    (when labels ``y`` are given), positive rates, and pairwise prediction
+    disagreement rates. ``items`` are expected newest first (``ModelRegistry.last``);
+    versions registered with the same sha256 as a newer one are scored once, under
+    the newer version. A version that fails to load or score is reported as
+    ``{"version", "error"}`` and left out of the disagreement table.
+    """
+    seen = set()
+    items = [it for it in items if not (it.sha256 in seen or seen.add(it.sha256))]
+    columns = list(X.columns) if hasattr(X, "columns") else None
+    scored = {}
+    versions = []
+    with shared_block(X=(X.shape, np.float64)) as (initargs, blk):
+        blk["X"][...] = X.to_numpy(dtype=float) if columns is not None else np.asarray(X, dtype=float)
+        with ProcessPoolExecutor(max_workers=max_workers or len(items) or 1, initializer=attach,
+                                 initargs=(*initargs, {"columns": columns})) as ex:
+            futures = [ex.submit(_score, {"path": it.path, "sha256": it.sha256}) for it in items]
+            for it, fut in zip(items, futures):
+                try:
+                    pred, proba = fut.result()
+                except Exception as e:
+                    versions.append({"version": it.version, "sha256": it.sha256, "error": f"{type(e).__name__}: {e}"})
+                    continue
+                scored[it.version] = pred
+                out = {"version": it.version, "sha256": it.sha256, "positive_rate": float(np.mean(pred)) if len(pred) else 0.0}
+                if y is not None:
+                    out["metrics"] = classification_metrics(y, pred, proba)
+                versions.append(out)
+
+    disagreement = {v: {o: float(np.mean(p != q)) for o, q in scored.items() if o != v} for v, p in scored.items()}
+    return {"versions": versions, "disagreement": disagreement}
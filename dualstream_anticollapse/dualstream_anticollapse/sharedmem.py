@@ -0,0 +1,54 @@
+"""Read-only numpy arrays shared with process-pool workers through one shared-memory block.
+
+The parent allocates and fills the block with ``shared_block``; each worker maps
+it once in the pool initializer (``attach``) and reads the arrays from
+``SHARED``, so tasks carry only small arguments and no array data is pickled.
+"""
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Per-worker read-only views of the shared arrays (plus any extras), set up by attach().
+SHARED: Dict[str, Any] = {}
+
+Layout = List[Tuple[str, Tuple[int, ...], str, int]]  # (name, shape, dtype, byte offset)
+
+def _views(buf, layout: Layout) -> Dict[str, np.ndarray]:
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=off) for name, shape, dtype, off in layout}
+
+@contextmanager
+def shared_block(**specs: Tuple[Tuple[int, ...], Any]):
+    """Allocate one shared-memory block holding an array per ``name=(shape, dtype)``.
+
+    Yields ``(initargs, arrays)``: pass ``initargs`` to ``attach`` as the pool
+    initializer arguments and fill the writable ``arrays`` before submitting
+    tasks. The block is unlinked on exit.
+    """
+    layout: Layout = []
+    size = 0
+    for name, (shape, dtype) in specs.items():
+        dt = np.dtype(dtype)
+        shape = tuple(int(s) for s in shape)
+        layout.append((name, shape, dt.str, size))
+        size += int(np.prod(shape)) * dt.itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+    arrays = _views(shm.buf, layout)
+    try:
+        yield (shm.name, layout), arrays
+    finally:
+        arrays.clear()  # the segment cannot be closed while views are exported
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        shm.unlink()
+
+def attach(shm_name: str, layout: Layout, extra: Optional[Dict[str, Any]] = None):
+    """Pool initializer: map the block read-only into ``SHARED``, with ``extra`` alongside."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _views(shm.buf, layout)
+    for v in views.values():
+        v.flags.writeable = False
+    SHARED.clear()
+    SHARED.update(views, shm=shm, **(extra or {}))
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 import argparse, json, math, os, sys, time
-from typing import Dict, List, Any, Tuple
+from contextlib import nullcontext
+from typing import Dict, List, Any, Optional, Tuple
 
 import torch
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForCausalLM
 
-from probes import ProbeEngine, MonologueFrame
+from probes import ProbeEngine, MonologueFrame, FrameBatch
+from quantization import prepare_cpu_inference, maybe_compile
+
+try:
+    from dualstream_anticollapse.profiling import PROFILER, cprofile_to
+except ImportError:  # toolkit not on sys.path: stage timing is unavailable
+    PROFILER = cprofile_to = None
+
+def _span(name: str, items: int = 0):
+    return PROFILER.span(name, items=items) if PROFILER is not None else nullcontext()
 
 def softmax_stable(x: torch.Tensor) -> torch.Tensor:
     x = x.float()
@@ -17,7 +27,8 @@ class DualStream:
     """
     Wrap an HF causal LM to emit two synchronized streams.
     """
-    def __init__(self, model_name: str = "gpt2", device: str = None, top_k: int = 5):
+    def __init__(self, model_name: str = "gpt2", device: str = None, top_k: int = 5, attn_top_n: Optional[int] = 8,
+                 precision: str = "fp32", compile: bool = False):
         self.model_name = model_name
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
@@ -25,11 +36,25 @@ class DualStream:
             # For causal LMs it's fine to set pad to eos for batching simplicity
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        # eager attention: SDPA kernels return no attention weights, which the attention probes need
+        self.model = AutoModelForCausalLM.from_pretrained(model_name, attn_implementation="eager")
+        if precision == "int8" and self.device != "cpu":
+            raise ValueError("int8 dynamic quantization runs on CPU only")
+        self.precision = precision
+        self.model = prepare_cpu_inference(self.model, precision)
         self.model.to(self.device)
         self.model.eval()
         self.top_k = top_k
+        self.attn_top_n = attn_top_n  # strongest heads kept per step; None keeps all L*H
         self.probes = ProbeEngine(self.model, self.tokenizer)
+        # probes read weights from the eager module; only the forward pass goes through torch.compile
+        self.forward = self.model
+        if compile:
+            warm = self.tokenizer("warm-up", return_tensors="pt").to(self.device)
+            self.forward = maybe_compile(self.model, example_inputs=dict(
+                input_ids=warm["input_ids"], attention_mask=warm["attention_mask"], output_attentions=True,
+                output_hidden_states=True, use_cache=False, return_dict=True))
+        self.compiled = self.forward is not self.model
 
     @torch.no_grad()
     def generate(self,
@@ -37,62 +62,78 @@ class DualStream:
                  max_new_tokens: int = 50,
                  temperature: float = 0.7,
                  top_p: float = 1.0,
+                 columnar: bool = False,
+                 forced_ids: Optional[List[int]] = None,
+                 return_frames: bool = False,
                  ) -> Dict[str, Any]:
+        """
+        Generate up to ``max_new_tokens`` tokens with a monologue frame per token.
+
+        ``forced_ids`` teacher-forces the answer tokens (frames still describe this
+        model's own distribution), which is how fidelity checks line up two runs.
+        ``return_frames`` adds the raw ``FrameBatch`` under ``"frame_batch"``.
+        """
+        if forced_ids is not None:
+            max_new_tokens = min(max_new_tokens, len(forced_ids))
 
         enc = self.tokenizer(prompt, return_tensors="pt")
         input_ids = enc["input_ids"].to(self.device)
         attn_mask = enc["attention_mask"].to(self.device)
 
         answer_tokens: List[int] = []
-        monologue_frames: List[MonologueFrame] = []
+        frames: FrameBatch = self.probes.new_batch(max_new_tokens, self.top_k, attn_top_n=self.attn_top_n)
 
         for step in range(max_new_tokens):
-            outputs = self.model(
-                input_ids=input_ids,
-                attention_mask=attn_mask,
-                output_attentions=True,
-                output_hidden_states=True,
-                use_cache=False,  # we want full attentions at each forward
-                return_dict=True,
-            )
-            # logits: [B, T, V]
-            last_logits = outputs.logits[:, -1, :].squeeze(0)  # [V]
-            probs = softmax_stable(last_logits)
-
-            # Top-K for the logit lens
-            k = min(self.top_k, probs.shape[-1])
-            top_probs, top_idx = torch.topk(probs, k=k, dim=-1)
-            top_pairs = [(int(top_idx[i].item()), float(top_probs[i].item())) for i in range(k)]
-
-            # Sample or greedy
-            if temperature <= 0.0:
-                next_id = int(top_idx[0].item())
-            else:
-                # Top-p / nucleus (optional simple impl)
-                if top_p < 1.0:
-                    sorted_probs, sorted_idx = torch.sort(probs, descending=True)
-                    cum = torch.cumsum(sorted_probs, dim=-1)
-                    nz = (cum > top_p).nonzero()
-                    max_j = nz[0, 0].item() + 1 if nz.numel() > 0 else probs.numel()
-                    probs_masked = torch.zeros_like(probs)
-                    probs_masked[sorted_idx[:max_j]] = probs[sorted_idx[:max_j]]
-                    probs = probs_masked / probs_masked.sum()
-                # temperature
-                logits_temp = torch.log(probs + 1e-9) / temperature
-                probs = torch.softmax(logits_temp, dim=-1)
-                next_id = int(torch.multinomial(probs, num_samples=1).item())
+            with _span("generate.forward", items=1):
+                outputs = self.forward(
+                    input_ids=input_ids,
+                    attention_mask=attn_mask,
+                    output_attentions=True,
+                    output_hidden_states=True,
+                    use_cache=False,  # we want full attentions at each forward
+                    return_dict=True,
+                )
+            with _span("generate.sample"):
+                # logits: [B, T, V]
+                last_logits = outputs.logits[:, -1, :].squeeze(0)  # [V]
+                probs = softmax_stable(last_logits)
+
+                # Top-K for the logit lens
+                k = min(self.top_k, probs.shape[-1])
+                top_probs, top_idx = torch.topk(probs, k=k, dim=-1)
+                top_pairs = [(int(top_idx[i].item()), float(top_probs[i].item())) for i in range(k)]
+
+                # Sample or greedy
+                if forced_ids is not None:
+                    next_id = int(forced_ids[step])
+                elif temperature <= 0.0:
+                    next_id = int(top_idx[0].item())
+                else:
+                    # Top-p / nucleus (optional simple impl)
+                    if top_p < 1.0:
+                        sorted_probs, sorted_idx = torch.sort(probs, descending=True)
+                        cum = torch.cumsum(sorted_probs, dim=-1)
+                        nz = (cum > top_p).nonzero()
+                        max_j = nz[0, 0].item() + 1 if nz.numel() > 0 else probs.numel()
+                        probs_masked = torch.zeros_like(probs)
+                        probs_masked[sorted_idx[:max_j]] = probs[sorted_idx[:max_j]]
+                        probs = probs_masked / probs_masked.sum()
+                    # temperature
+                    logits_temp = torch.log(probs + 1e-9) / temperature
+                    probs = torch.softmax(logits_temp, dim=-1)
+                    next_id = int(torch.multinomial(probs, num_samples=1).item())
 
             # Build monologue frame BEFORE appending the new token
-            frame = self.probes.build_frame(
-                step=step,
-                input_ids=input_ids,
-                model_outputs=outputs,
-                topk_ids=[tid for tid, _ in top_pairs],
-                topk_probs=[p for _, p in top_pairs],
-                chosen_id=next_id,
-                prompt_text=prompt,
-            )
-            monologue_frames.append(frame)
+            with _span("generate.build_frame"):
+                self.probes.capture(
+                    frames,
+                    input_ids=input_ids,
+                    model_outputs=outputs,
+                    topk_ids=[tid for tid, _ in top_pairs],
+                    topk_probs=[p for _, p in top_pairs],
+                    chosen_id=next_id,
+                    prompt_text=prompt,
+                )
 
             # Append token to sequence
             next_token = torch.tensor([[next_id]], device=self.device)
@@ -106,17 +147,28 @@ class DualStream:
             if next_id == self.tokenizer.eos_token_id:
                 break
 
-        answer_text = self.tokenizer.decode(answer_tokens, skip_special_tokens=True)
-        monologue_lines = [frame.to_string(self.tokenizer) for frame in monologue_frames]
-        monologue_text = "\n".join(monologue_lines)
+        with _span("generate.decode", items=len(answer_tokens)):
+            answer_text = self.tokenizer.decode(answer_tokens, skip_special_tokens=True)
+        with _span("generate.render", items=len(frames)):
+            monologue_text = "\n".join(frames.to_strings(self.tokenizer))
+            if columnar:
+                frames_out = {"monologue_columns": frames.to_columns()}
+            else:
+                frames_out = {"monologue_frames": frames.to_dicts()}
 
-        return {
+        result = {
             "answer_text": answer_text,
-            "monologue_frames": [frame.to_dict() for frame in monologue_frames],
+            "answer_ids": answer_tokens,
+            **frames_out,
             "monologue_text": monologue_text,
             "model": self.model_name,
             "top_k": self.top_k,
+            "precision": self.precision,
+            "compiled": self.compiled,
         }
+        if return_frames:
+            result["frame_batch"] = frames
+        return result
 
 
 def main():
@@ -128,15 +180,46 @@ def main():
     ap.add_argument("--top-p", type=float, default=1.0)
     ap.add_argument("--top-k", type=int, default=5)
     ap.add_argument("--out", type=str, default="dual_stream_output.json")
+    ap.add_argument("--attn-top-n", type=int, default=8, help="Keep only the N strongest attention heads per token (0 keeps all)")
+    ap.add_argument("--columnar", action="store_true", help="Save monologue frames as compact column arrays")
+    ap.add_argument("--precision", choices=["fp32", "bf16", "int8"], default="fp32", help="CPU inference precision")
+    ap.add_argument("--compile", action="store_true", help="torch.compile the forward pass where available")
+    ap.add_argument("--fidelity-report", type=str, default=None,
+                    help="Also run fp32 and write a probe-fidelity report for --precision/--compile")
+    ap.add_argument("--profile-json", type=str, default=None, help="Write per-stage timings (JSON summary)")
+    ap.add_argument("--profile-prom", type=str, default=None, help="Write per-stage timings (Prometheus text file)")
+    ap.add_argument("--cprofile", type=str, default=None, help="Dump cProfile stats for the generation")
     args = ap.parse_args()
 
-    ds = DualStream(model_name=args.model, top_k=args.top_k)
-    result = ds.generate(
-        prompt=args.prompt,
-        max_new_tokens=args.max_new_tokens,
-        temperature=args.temperature,
-        top_p=args.top_p,
-    )
+    profiling = args.profile_json or args.profile_prom or args.cprofile
+    if profiling and PROFILER is None:
+        ap.error("profiling needs the dualstream_anticollapse package on PYTHONPATH")
+    if args.profile_json or args.profile_prom:
+        PROFILER.enable()
+
+    ds = DualStream(model_name=args.model, top_k=args.top_k, attn_top_n=args.attn_top_n or None,
+                    precision=args.precision, compile=args.compile)
+    with (cprofile_to(args.cprofile) if profiling else nullcontext()):
+        result = ds.generate(
+            prompt=args.prompt,
+            max_new_tokens=args.max_new_tokens,
+            temperature=args.temperature,
+            top_p=args.top_p,
+            columnar=args.columnar,
+        )
+    if args.profile_json:
+        PROFILER.write_json(args.profile_json)
+    if args.profile_prom:
+        PROFILER.write_prometheus(args.profile_prom)
+
+    if args.fidelity_report:
+        from quantization import compare_streams
+        reference = DualStream(model_name=args.model, device="cpu", top_k=args.top_k, attn_top_n=args.attn_top_n or None)
+        report = compare_streams(reference, ds, [args.prompt], max_new_tokens=args.max_new_tokens)
+        report["precision"], report["compile"] = args.precision, ds.compiled
+        with open(args.fidelity_report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Fidelity ({args.precision}): {json.dumps(report['summary'])}")
 
     print("\n=== Answer Stream (A) ===\n")
     print(result["answer_text"])
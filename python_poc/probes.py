@@ -1,8 +1,13 @@
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 import torch
 import torch.nn.functional as F
 
+def _sanitize_token(tok: str) -> str:
+    return tok.replace('"', '')
+
+
 # A single monologue "frame" aligned to one answer token
 @dataclass
 class MonologueFrame:
@@ -19,9 +24,6 @@ class MonologueFrame:
         # Logit Lens
         topk_pairs = [(tokenizer.decode([tid]).strip() or str(tid), p) for tid, p in zip(self.topk_ids, self.topk_probs)]
         # Avoid backslashes inside f-strings by normalizing tokens first
-        def _sanitize_token(tok: str) -> str:
-            return tok.replace('"', '')
-
         ll = ",".join([f"('{_sanitize_token(t)}',{p:.3f})" for t, p in topk_pairs])
         parts.append(f"[LOGIT_LENS:TOP_{len(self.topk_ids)}:{ll}]")
 
@@ -53,6 +55,164 @@ class MonologueFrame:
         }
 
 
+class FrameBatch:
+    """
+    Struct-of-arrays storage for all monologue frames of one generation.
+
+    Arrays are preallocated for ``capacity`` steps: int32 token/layer/head ids and
+    float16 (``value_dtype``) probabilities, attention weights and concept scores.
+    Only the ``attn_top_n`` strongest heads per step are kept (None keeps all L*H).
+    ``batch[i]`` materializes a ``MonologueFrame`` on demand; ``to_strings`` and
+    ``to_dicts`` render the whole batch in the existing text/JSON formats.
+    """
+    def __init__(self, capacity: int, top_k: int, concept_names: List[str], concept_threshold: float = 0.0,
+                 attn_top_n: Optional[int] = 8, value_dtype=np.float16):
+        self.capacity = capacity
+        self.top_k = top_k
+        self.concept_names = list(concept_names)
+        self.concept_threshold = concept_threshold
+        self.attn_top_n = attn_top_n
+        self.n = 0
+        self.chosen_id = np.zeros(capacity, dtype=np.int32)
+        self.topk_ids = np.zeros((capacity, top_k), dtype=np.int32)
+        self.topk_probs = np.zeros((capacity, top_k), dtype=value_dtype)
+        self.topk_len = np.zeros(capacity, dtype=np.int32)
+        self.concepts = np.zeros((capacity, len(self.concept_names)), dtype=value_dtype)
+        self.notes: List[List[str]] = []
+        self.value_dtype = value_dtype
+        self.attn_ids = None  # [capacity, N, 3] (layer, head, token_idx); allocated on first append
+        self.attn_w = None    # [capacity, N]
+        self.attn_len = np.zeros(capacity, dtype=np.int32)
+
+    def _alloc_attn(self, n: int):
+        self.attn_ids = np.zeros((self.capacity, n, 3), dtype=np.int32)
+        self.attn_w = np.zeros((self.capacity, n), dtype=self.value_dtype)
+
+    def append(self, chosen_id: int, topk_ids, topk_probs, attn_ids, attn_w, concept_scores, notes: List[str]):
+        """Store one step. ``attn_ids`` is [n, 3] (layer, head, idx) sorted by ``attn_w`` descending."""
+        i = self.n
+        if i >= self.capacity:
+            raise IndexError("FrameBatch is full")
+        if self.attn_ids is None:
+            self._alloc_attn(max(len(attn_w), 1) if self.attn_top_n is None else self.attn_top_n)
+        k = len(topk_ids)
+        m = min(len(attn_w), self.attn_ids.shape[1])
+        self.chosen_id[i] = chosen_id
+        self.topk_ids[i, :k] = topk_ids
+        self.topk_probs[i, :k] = topk_probs
+        self.topk_len[i] = k
+        self.attn_ids[i, :m] = np.asarray(attn_ids)[:m]
+        self.attn_w[i, :m] = np.asarray(attn_w)[:m]
+        self.attn_len[i] = m
+        self.concepts[i] = concept_scores
+        self.notes.append(list(notes))
+        self.n += 1
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> MonologueFrame:
+        if not -self.n <= i < self.n:
+            raise IndexError(i)
+        i %= self.n
+        k, m = self.topk_len[i], self.attn_len[i]
+        ids = self.attn_ids[i, :m].tolist() if m else []
+        return MonologueFrame(
+            step=i,
+            chosen_id=int(self.chosen_id[i]),
+            topk_ids=self.topk_ids[i, :k].tolist(),
+            topk_probs=self.topk_probs[i, :k].astype(np.float32).tolist(),
+            attn_tops=[(l, h, t, w) for (l, h, t), w in zip(ids, self.attn_w[i, :m].astype(np.float32).tolist())],
+            concepts=self._concepts(i),
+            notes=self.notes[i],
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def _concepts(self, i: int) -> Dict[str, float]:
+        row = self.concepts[i].astype(np.float32).tolist()
+        return {name: v for name, v in zip(self.concept_names, row) if v >= self.concept_threshold}
+
+    def _decode_table(self, tokenizer) -> Dict[int, str]:
+        """Decode every distinct top-K id once."""
+        ids = np.unique(self.topk_ids[:self.n]).tolist()
+        return {tid: _sanitize_token(tokenizer.decode([tid]).strip() or str(tid)) for tid in ids}
+
+    def to_strings(self, tokenizer, max_attn: int = 8) -> List[str]:
+        """Render each step in ``MonologueFrame.to_string`` format."""
+        n = self.n
+        if n == 0:
+            return []
+        toks = self._decode_table(tokenizer)
+        probs = np.char.mod("%.3f", self.topk_probs[:n].astype(np.float32))
+        weights = np.char.mod("%.2f", self.attn_w[:n, :max_attn].astype(np.float32)) if self.attn_w is not None else None
+        concepts = self.concepts[:n].astype(np.float32)
+        show = (concepts >= self.concept_threshold) & (concepts > 0.0)
+        scores = np.char.mod("%.2f", concepts)
+        lines = []
+        for i in range(n):
+            k = self.topk_len[i]
+            ll = ",".join(f"('{toks[t]}',{p})" for t, p in zip(self.topk_ids[i, :k].tolist(), probs[i, :k]))
+            parts = [f"[LOGIT_LENS:TOP_{k}:{ll}]"]
+            m = min(self.attn_len[i], max_attn)
+            if m:
+                for (layer, head, tok_idx), w in zip(self.attn_ids[i, :m].tolist(), weights[i, :m]):
+                    parts.append(f"[ATTN_L{layer}.H{head}:TOP_IDX={tok_idx};W={w}]")
+            for j in np.flatnonzero(show[i]):
+                parts.append(f"[CONCEPT:{self.concept_names[j]}:{scores[i, j]}]")
+            parts.extend(f"[{note}]" for note in self.notes[i])
+            lines.append(" ".join(parts))
+        return lines
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Per-step dicts in ``MonologueFrame.to_dict`` format (attention limited to the retained heads)."""
+        n = self.n
+        if n == 0:
+            return []
+        topk_ids = self.topk_ids[:n].tolist()
+        topk_probs = self.topk_probs[:n].astype(np.float32).tolist()
+        concepts = self.concepts[:n].astype(np.float32).tolist()
+        attn_ids = self.attn_ids[:n].tolist() if self.attn_ids is not None else [[]] * n
+        attn_w = self.attn_w[:n].astype(np.float32).tolist() if self.attn_w is not None else [[]] * n
+        out = []
+        for i, (k, m) in enumerate(zip(self.topk_len[:n].tolist(), self.attn_len[:n].tolist())):
+            out.append({
+                "step": i,
+                "chosen_id": int(self.chosen_id[i]),
+                "topk_ids": topk_ids[i][:k],
+                "topk_probs": topk_probs[i][:k],
+                "attn_tops": [(l, h, t, w) for (l, h, t), w in zip(attn_ids[i][:m], attn_w[i][:m])],
+                "concepts": {c: v for c, v in zip(self.concept_names, concepts[i]) if v >= self.concept_threshold},
+                "notes": self.notes[i],
+            })
+        return out
+
+    def to_columns(self, decimals: int = 4) -> Dict[str, Any]:
+        """Compact columnar JSON: one list per field instead of one object per step."""
+        n = self.n
+        r = lambda a: np.round(a.astype(np.float64), decimals).tolist()
+        m = int(self.attn_len[:n].max()) if n else 0
+        return {
+            "steps": n,
+            "chosen_id": self.chosen_id[:n].tolist(),
+            "topk_ids": self.topk_ids[:n].tolist(),
+            "topk_probs": r(self.topk_probs[:n]),
+            "attn_ids": self.attn_ids[:n, :m].tolist() if self.attn_ids is not None else [],
+            "attn_w": r(self.attn_w[:n, :m]) if self.attn_w is not None else [],
+            "attn_len": self.attn_len[:n].tolist(),
+            "concept_names": self.concept_names,
+            "concept_threshold": self.concept_threshold,
+            "concepts": r(self.concepts[:n]),
+            "notes": self.notes,
+        }
+
+    def nbytes(self) -> int:
+        arrays = [self.chosen_id, self.topk_ids, self.topk_probs, self.topk_len, self.concepts, self.attn_len]
+        arrays += [a for a in (self.attn_ids, self.attn_w) if a is not None]
+        return sum(a.nbytes for a in arrays)
+
+
 class ProbeEngine:
     """
     A tiny, pluggable probe engine.
@@ -118,6 +278,38 @@ class ProbeEngine:
         tops.sort(key=lambda x: x[3], reverse=True)
         return tops
 
+    def _attention_top_n(self, outputs, n: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized ``_attention_summary`` keeping only the ``n`` strongest heads.
+
+        Returns ``ids`` [n, 3] int32 (layer, head, token_idx) and ``w`` [n] float32, sorted by weight desc.
+        """
+        attns = outputs.attentions
+        layers = [(i, a[0, :, -1, :]) for i, a in enumerate(attns or ()) if a is not None]  # each [H, T]
+        if not layers:
+            return np.zeros((0, 3), dtype=np.int32), np.zeros(0, dtype=np.float32)
+        head_max, head_idx = torch.stack([a for _, a in layers]).max(dim=-1)  # [L, H]
+        H = head_max.shape[1]
+        flat = head_max.flatten()
+        n = flat.numel() if n is None else min(n, flat.numel())
+        w, order = torch.topk(flat, k=n)
+        layer_ids = torch.tensor([i for i, _ in layers], device=order.device)
+        ids = torch.stack([layer_ids[order // H], order % H, head_idx.flatten()[order]], dim=-1)
+        return ids.to(torch.int32).cpu().numpy(), w.float().cpu().numpy()
+
+    def new_batch(self, capacity: int, top_k: int, attn_top_n: Optional[int] = 8, value_dtype=np.float16) -> "FrameBatch":
+        return FrameBatch(capacity, top_k, list(self.anchors), concept_threshold=self.sim_threshold,
+                          attn_top_n=attn_top_n, value_dtype=value_dtype)
+
+    def capture(self, batch: "FrameBatch", input_ids, model_outputs, topk_ids, topk_probs, chosen_id: int, prompt_text: str):
+        """``build_frame`` equivalent that writes straight into ``batch`` without per-head tuples."""
+        last_hidden = model_outputs.hidden_states[-1][0, -1, :]  # [D]
+        h = F.normalize(last_hidden.unsqueeze(0).float(), dim=-1)  # [1, D]
+        dirs = torch.cat([d.float() for d in self.anchors.values()], dim=0)  # [C, D]
+        scores = torch.clamp((h * dirs).sum(dim=-1), min=0.0).cpu().numpy()
+        attn_ids, attn_w = self._attention_top_n(model_outputs, batch.attn_top_n)
+        notes = self._notes_and_conflicts(prompt_text, topk_ids, topk_probs, chosen_id)
+        batch.append(chosen_id, topk_ids, topk_probs, attn_ids, attn_w, scores, notes)
+
     def _notes_and_conflicts(self, prompt_text: str, topk_tokens: List[int], topk_probs: List[float], chosen_id: int) -> List[str]:
         notes = []
         # confirmation bias heuristic on prompt
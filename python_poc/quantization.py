@@ -0,0 +1,138 @@
+"""
+CPU inference modes for DualStream and a fidelity check of the monologue probes.
+
+- "bf16": cast weights to bfloat16.
+- "int8": dynamic int8 quantization of every linear layer. GPT-2's Conv1D
+  projections are rewritten as nn.Linear first; otherwise only lm_head would be
+  quantized.
+
+A quantized model may still pick the same tokens while its probes drift, so
+``compare_streams`` teacher-forces the candidate onto the tokens of a fp32
+reference run and ``fidelity_report`` compares the two runs' monologue frames.
+"""
+import warnings
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import torch
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def _conv1d_to_linear(model: torch.nn.Module) -> torch.nn.Module:
+    """Replace HF ``Conv1D`` modules (weight [in, out]) with equivalent ``nn.Linear`` (weight [out, in])."""
+    try:
+        from transformers.pytorch_utils import Conv1D
+    except ImportError:
+        return model
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                lin = torch.nn.Linear(child.weight.shape[0], child.weight.shape[1], bias=child.bias is not None)
+                lin.weight.data = child.weight.data.t().contiguous()
+                if child.bias is not None:
+                    lin.bias.data = child.bias.data.clone()
+                setattr(parent, name, lin)
+    return model
+
+
+def prepare_cpu_inference(model: torch.nn.Module, precision: str = "fp32") -> torch.nn.Module:
+    """Return ``model`` converted for ``precision`` (one of ``PRECISIONS``)."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    if precision == "int8":
+        from torch.ao.quantization import quantize_dynamic
+        model = _conv1d_to_linear(model)
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def maybe_compile(model: torch.nn.Module, example_inputs: Optional[Dict[str, Any]] = None):
+    """``torch.compile`` with dynamic shapes (the sequence grows every step) when available, else ``model``.
+
+    Compilation is lazy, so backend failures (e.g. inductor without a C++
+    compiler) only surface on the first call. With ``example_inputs`` the
+    compiled module is run once on them, and ``model`` is returned if that fails.
+    """
+    if not hasattr(torch, "compile"):
+        return model
+    try:
+        compiled = torch.compile(model, dynamic=True)
+        if example_inputs is not None:
+            with torch.no_grad():
+                compiled(**example_inputs)
+        return compiled
+    except Exception as e:
+        warnings.warn(f"torch.compile failed ({type(e).__name__}: {e}); running eager")
+        if hasattr(torch, "_dynamo"):
+            torch._dynamo.reset()
+        return model
+
+
+def fidelity_report(reference, candidate, min_topk_overlap: float = 0.8, min_attn_agreement: float = 0.9,
+                    max_concept_delta: float = 0.05) -> Dict[str, Any]:
+    """Compare two ``FrameBatch`` captures of the same token sequence.
+
+    - ``topk_overlap``: mean |ref top-K ∩ cand top-K| / K per step
+    - ``chosen_agreement``: fraction of steps where the candidate's greedy choice matches the reference token
+    - ``concept_delta``: mean / max absolute concept-score difference, overall and per concept
+    - ``attn_argmax_agreement``: fraction of (step, layer, head) retained in both runs that attend to the same token
+
+    ``trustworthy`` is True when all of these stay within the given limits.
+    """
+    n = min(len(reference), len(candidate))
+    if n == 0:
+        return {"steps": 0, "trustworthy": False}
+    overlaps, chosen = [], []
+    agree, compared = 0, 0
+    for i in range(n):
+        k = int(reference.topk_len[i])
+        ref_ids = reference.topk_ids[i, :k]
+        cand_ids = candidate.topk_ids[i, :int(candidate.topk_len[i])]
+        overlaps.append(len(np.intersect1d(ref_ids, cand_ids)) / max(k, 1))
+        chosen.append(int(cand_ids[0]) == int(reference.chosen_id[i]) if len(cand_ids) else False)
+        ref_attn = {(l, h): t for l, h, t in reference.attn_ids[i, :reference.attn_len[i]].tolist()}
+        for l, h, t in candidate.attn_ids[i, :candidate.attn_len[i]].tolist():
+            if (l, h) in ref_attn:
+                compared += 1
+                agree += ref_attn[(l, h)] == t
+    delta = np.abs(reference.concepts[:n].astype(np.float32) - candidate.concepts[:n].astype(np.float32))
+    report = {
+        "steps": n,
+        "topk_overlap": float(np.mean(overlaps)),
+        "chosen_agreement": float(np.mean(chosen)),
+        "concept_delta": {
+            "mean": float(delta.mean()) if delta.size else 0.0,
+            "max": float(delta.max()) if delta.size else 0.0,
+            "per_concept_max": {name: float(delta[:, j].max()) for j, name in enumerate(reference.concept_names)},
+        },
+        "attn_argmax_agreement": agree / compared if compared else None,
+        "attn_heads_compared": compared,
+    }
+    report["trustworthy"] = bool(
+        report["topk_overlap"] >= min_topk_overlap
+        and report["concept_delta"]["max"] <= max_concept_delta
+        and (report["attn_argmax_agreement"] is None or report["attn_argmax_agreement"] >= min_attn_agreement)
+    )
+    return report
+
+
+def compare_streams(reference, candidate, prompts: List[str], max_new_tokens: int = 32) -> Dict[str, Any]:
+    """Run ``reference`` greedily, teacher-force ``candidate`` onto the same tokens, and report fidelity per prompt.
+
+    Both arguments are ``DualStream`` instances (e.g. fp32 and int8 of the same model).
+    """
+    per_prompt = []
+    for prompt in prompts:
+        ref = reference.generate(prompt, max_new_tokens=max_new_tokens, temperature=0.0, return_frames=True)
+        cand = candidate.generate(prompt, max_new_tokens=max_new_tokens, forced_ids=ref["answer_ids"], return_frames=True)
+        per_prompt.append({"prompt": prompt, **fidelity_report(ref["frame_batch"], cand["frame_batch"])})
+    keys = ("topk_overlap", "chosen_agreement")
+    summary: Dict[str, Optional[float]] = {k: float(np.mean([r[k] for r in per_prompt if k in r])) for k in keys}
+    summary["concept_delta_max"] = max((r["concept_delta"]["max"] for r in per_prompt if "concept_delta" in r), default=0.0)
+    attn = [r["attn_argmax_agreement"] for r in per_prompt if r.get("attn_argmax_agreement") is not None]
+    summary["attn_argmax_agreement"] = float(np.mean(attn)) if attn else None
+    summary["trustworthy"] = all(r["trustworthy"] for r in per_prompt)
+    return {"summary": summary, "prompts": per_prompt}